@@ -0,0 +1,76 @@
+"""
+Simulate a burst of weather jobs to see how quickly the backlog drains with the worker autoscaler's scaling policy,
+compared with the single worker the pipeline runs by default. Uses a simulated clock, so it runs instantly and needs no
+Docker or Redis.
+
+Run with: python -m benchmarks.autoscaler_burst_simulation
+"""
+from src.controller.worker_autoscaler import ScalingPolicy
+
+BURST_JOBS = 600
+STEADY_JOBS_PER_SECOND = 1.0
+WORKER_JOBS_PER_SECOND = 2.0
+WORKER_STARTUP_SECONDS = 3.0
+CHECK_INTERVAL = 2.0
+TICK = 0.1
+MAX_SECONDS = 3600
+
+
+def simulate(policy, verbose=False):
+    """
+    Run the simulation until the burst has been drained.
+    :param policy: ScalingPolicy deciding the number of workers
+    :param verbose: bool indicating whether to print every scaling decision
+    :return: (float seconds to drain the backlog, int peak number of workers)
+    """
+    now = 0.0
+    queue = float(BURST_JOBS)
+    # time at which each worker becomes ready to process jobs
+    workers = [0.0]
+    processed = 0.0
+    last_processed = 0.0
+    processing_rate = 0.0
+    next_check = 0.0
+    peak = 1
+    while now < MAX_SECONDS:
+        ready_workers = sum(1 for ready_time in workers if ready_time <= now)
+        done = min(queue, ready_workers * WORKER_JOBS_PER_SECOND * TICK)
+        queue += STEADY_JOBS_PER_SECOND * TICK - done
+        processed += done
+
+        if now >= next_check:
+            rate = (processed - last_processed) / CHECK_INTERVAL
+            processing_rate = 0.5 * processing_rate + 0.5 * rate
+            last_processed = processed
+            desired, reason = policy.decide(int(queue), processing_rate, len(workers), now)
+            if desired != len(workers):
+                if verbose:
+                    print(f"  t={now:6.1f}s scale {len(workers)} -> {desired}: {reason}")
+                if desired > len(workers):
+                    workers += [now + WORKER_STARTUP_SECONDS] * (desired - len(workers))
+                else:
+                    workers = workers[:desired]
+                policy.last_scale_time = now
+                peak = max(peak, len(workers))
+            next_check = now + CHECK_INTERVAL
+
+        if queue < STEADY_JOBS_PER_SECOND:
+            return now, peak
+        now += TICK
+    return MAX_SECONDS, peak
+
+
+def __main__():
+    print(f"Burst of {BURST_JOBS} jobs, {STEADY_JOBS_PER_SECOND} jobs/s steady arrivals, "
+          f"{WORKER_JOBS_PER_SECOND} jobs/s per worker, {WORKER_STARTUP_SECONDS}s worker start-up")
+
+    seconds, peak = simulate(ScalingPolicy(min_replicas=1, max_replicas=1))
+    print(f"Fixed single worker: backlog drained in {seconds:.1f}s")
+
+    print("Autoscaled (1-10 workers):")
+    seconds, peak = simulate(ScalingPolicy(min_replicas=1, max_replicas=10), verbose=True)
+    print(f"Autoscaled: backlog drained in {seconds:.1f}s with at most {peak} workers")
+
+
+if __name__ == "__main__":
+    __main__()
@@ -0,0 +1,63 @@
+"""
+Compare the throughput of the weather pipeline's list transport (LPUSH/BRPOP) with the Redis Streams transport
+(XADD/XREADGROUP/XACK). Jobs are enqueued one per request like the API does, then consumed and acknowledged like the
+worker does (without the database). Needs the weather pipeline's Redis, which docker-compose exposes on
+localhost:6379. Uses a separate Redis database, so it doesn't touch the real queue.
+
+Run with: python -m benchmarks.job_transport_throughput [jobs]
+"""
+import os
+import sys
+import time
+
+import redis
+
+PIPELINE_PATH = os.path.join(os.path.dirname(__file__), "..", "src", "weather-pipeline")
+sys.path.insert(0, os.path.join(PIPELINE_PATH, "api"))
+sys.path.insert(0, os.path.join(PIPELINE_PATH, "worker"))
+from job_consumer import create_job_consumer  # noqa: E402
+from job_queue import WEATHER_JOBS_LIST, WEATHER_JOBS_STREAM, create_job_queue  # noqa: E402
+
+BENCHMARK_DB = 15
+
+
+def run(redis_client, transport, jobs):
+    """
+    Enqueue and then consume the given number of jobs with a transport.
+    :return: (float enqueue jobs/s, float consume jobs/s)
+    """
+    redis_client.delete(WEATHER_JOBS_LIST, WEATHER_JOBS_STREAM)
+    job_queue = create_job_queue(redis_client, transport)
+    job_consumer = create_job_consumer(redis_client, transport)
+    job = {"city": "Cork"}
+
+    start = time.perf_counter()
+    for _ in range(jobs):
+        job_queue.enqueue(job)
+    enqueue_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    consumed = 0
+    while consumed < jobs:
+        batch = job_consumer.read()
+        job_consumer.ack([job_id for (job_id, _) in batch])
+        consumed += len(batch)
+    consume_seconds = time.perf_counter() - start
+
+    lag = job_queue.get_lag()
+    redis_client.delete(WEATHER_JOBS_LIST, WEATHER_JOBS_STREAM)
+    return jobs / enqueue_seconds, jobs / consume_seconds, lag
+
+
+def __main__():
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    redis_client = redis.Redis(host=os.getenv("REDIS_HOST", "localhost"), port=6379, db=BENCHMARK_DB)
+    print(f"{jobs} jobs per transport")
+    for transport in ["list", "stream"]:
+        enqueue_rate, consume_rate, lag = run(redis_client, transport, jobs)
+        print(f"{transport:<7} enqueue {enqueue_rate:>9.0f} jobs/s - consume + ack {consume_rate:>9.0f} jobs/s - "
+              f"lag after: {lag}")
+
+
+if __name__ == "__main__":
+    __main__()
@@ -0,0 +1,143 @@
+"""
+Benchmark the Kubernetes menu actions against a local fake API server, comparing the informer cache with listing the
+resources on every action.
+
+Run with: python -m benchmarks.kubernetes_informer_benchmark
+"""
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+from src.controller.kubernetes_controller import KubernetesController
+
+POD_COUNT = 500
+DEPLOYMENT_COUNT = 50
+ACTIONS = 1000
+REQUEST_LATENCY = 0.002  # simulated round trip to the API server, in seconds
+WATCH_DURATION = 0.2  # the fake server closes each watch after this long to exercise resourceVersion resumption
+
+
+class FakeKubernetesApiServer:
+    def __init__(self):
+        """
+        In-process stand-in for the Kubernetes API server, implementing the parts of CoreV1Api and AppsV1Api used by
+        the KubernetesController and counting every round trip.
+        :return: None
+        """
+        self.calls = Counter()
+        self.resource_version = 0
+        self.events = []
+        self.objects = {"pods": {}, "deployments": {}}
+        self._changed = threading.Condition()
+        for i in range(DEPLOYMENT_COUNT):
+            self._store("deployments", "default", f"deployment-{i}",
+                        spec=SimpleNamespace(replicas=1), status=SimpleNamespace(ready_replicas=1))
+        for i in range(POD_COUNT):
+            self._store("pods", "default", f"pod-{i}",
+                        spec=SimpleNamespace(node_name="node-1"), status=SimpleNamespace(phase="Running"))
+
+    def _store(self, resource, namespace, name, spec, status, event_type="ADDED"):
+        with self._changed:
+            self.resource_version += 1
+            metadata = SimpleNamespace(namespace=namespace, name=name, resource_version=str(self.resource_version))
+            obj = SimpleNamespace(metadata=metadata, spec=spec, status=status)
+            self.objects[resource][f"{namespace}/{name}"] = obj
+            self.events.append((self.resource_version, resource, {"type": event_type, "object": obj}))
+            self._changed.notify_all()
+            return obj
+
+    def _request(self, name):
+        self.calls[name] += 1
+        time.sleep(REQUEST_LATENCY)
+
+    def _list(self, resource):
+        with self._changed:
+            items = list(self.objects[resource].values())
+            metadata = SimpleNamespace(resource_version=str(self.resource_version))
+        return SimpleNamespace(items=items, metadata=metadata)
+
+    def list_pod_for_all_namespaces(self):
+        self._request("list pods")
+        return self._list("pods")
+
+    def list_deployment_for_all_namespaces(self):
+        self._request("list deployments")
+        return self._list("deployments")
+
+    def patch_namespaced_deployment_scale(self, name, namespace, body):
+        self._request("scale deployment")
+        deployment = self.objects["deployments"][f"{namespace}/{name}"]
+        spec = SimpleNamespace(replicas=body["spec"]["replicas"])
+        self._store("deployments", namespace, name, spec, deployment.status, event_type="MODIFIED")
+
+    def read_namespaced_pod_log(self, name, namespace, tail_lines=100):
+        self._request("pod logs")
+        return f"logs of {namespace}/{name}"
+
+    def watch(self, list_func, resource_version, timeout_seconds):
+        """
+        Stream the events after the given resourceVersion, closing the watch after WATCH_DURATION.
+        """
+        resource = "pods" if list_func == self.list_pod_for_all_namespaces else "deployments"
+        self._request(f"watch {resource}")
+        last_seen = int(resource_version)
+        deadline = time.monotonic() + min(timeout_seconds, WATCH_DURATION)
+        while time.monotonic() < deadline:
+            with self._changed:
+                self._changed.wait_for(lambda: self.resource_version > last_seen,
+                                       timeout=max(0.0, deadline - time.monotonic()))
+                pending = [(version, event) for version, event_resource, event in self.events
+                           if version > last_seen and event_resource == resource]
+                last_seen = self.resource_version
+            for _, event in pending:
+                yield event
+
+
+def time_actions(action):
+    start = time.perf_counter()
+    for _ in range(ACTIONS):
+        action()
+    return time.perf_counter() - start
+
+
+def __main__():
+    api_server = FakeKubernetesApiServer()
+    controller = KubernetesController(core_v1_api=api_server, apps_v1_api=api_server, watch_func=api_server.watch)
+    controller.list_pods()
+    seeded_calls = Counter(api_server.calls)
+
+    def informer_action():
+        controller.list_pods()
+        controller.list_deployments()
+
+    def list_action():
+        api_server.list_pod_for_all_namespaces()
+        api_server.list_deployment_for_all_namespaces()
+
+    informer_time = time_actions(informer_action)
+    new_calls = api_server.calls - seeded_calls
+    print(f"Informer cache: {ACTIONS} actions in {informer_time * 1000:.1f} ms "
+          f"({informer_time / ACTIONS * 1e6:.1f} us/action), "
+          f"API list calls: {new_calls['list pods'] + new_calls['list deployments']}")
+
+    calls_before = sum(api_server.calls.values())
+    list_time = time_actions(list_action)
+    print(f"List per action: {ACTIONS} actions in {list_time * 1000:.1f} ms "
+          f"({list_time / ACTIONS * 1e6:.1f} us/action), API calls: {sum(api_server.calls.values()) - calls_before}")
+
+    version = controller.deployment_informer.wait_for_change()
+    start = time.perf_counter()
+    controller.scale_deployment("default/deployment-0", 3)
+    while controller.get_deployment("default/deployment-0").spec.replicas != 3:
+        version = controller.deployment_informer.wait_for_change(version, timeout=1)
+    print(f"Scale applied to the cache through WATCH in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    controller.stop()
+    print(f"LIST calls in total: {api_server.calls['list pods'] + api_server.calls['list deployments'] - 2 * ACTIONS} "
+          f"(seeding only), WATCH requests resumed from resourceVersion: "
+          f"{api_server.calls['watch pods'] + api_server.calls['watch deployments']}")
+
+
+if __name__ == "__main__":
+    __main__()
@@ -0,0 +1,68 @@
+"""
+Measure the latency the weather API's admission check (rate limiter + queue depth check) adds to enqueueing a job.
+Needs the weather pipeline's Redis, which docker-compose exposes on localhost:6379. Uses its own keys, so it doesn't
+touch the real queue.
+
+Run with: python -m benchmarks.rate_limiter_latency [iterations]
+"""
+import os
+import statistics
+import sys
+import time
+
+import redis
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "weather-pipeline", "api"))
+from rate_limiter import AdmissionController  # noqa: E402
+
+QUEUE_KEY = "benchmark:weather_jobs"
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[min(int(len(values) * percent / 100), len(values) - 1)]
+
+
+def measure(action, iterations):
+    latencies = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        action(i)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def __main__():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    redis_client = redis.Redis(host=os.getenv("REDIS_HOST", "localhost"), port=6379, db=0)
+    # a queue depth limit that is never reached, so the queue length is still read (0 would skip the check)
+    admission_controller = AdmissionController(redis_client, QUEUE_KEY, capacity=iterations, refill_per_second=1000,
+                                               max_queue_depth=10 ** 9, key_prefix="benchmark:rate_limit:")
+
+    def enqueue(i):
+        redis_client.lpush(QUEUE_KEY, '{"city": "Cork"}')
+
+    def admit_and_enqueue(i):
+        # spread the requests over 100 clients, like a busy API would see
+        admission_controller.check(f"client-{i % 100}")
+        redis_client.lpush(QUEUE_KEY, '{"city": "Cork"}')
+
+    try:
+        # warm up the connection and load the script
+        measure(admit_and_enqueue, 100)
+        baseline = measure(enqueue, iterations)
+        limited = measure(admit_and_enqueue, iterations)
+    finally:
+        redis_client.delete(QUEUE_KEY, *[f"benchmark:rate_limit:client-{i}" for i in range(100)])
+
+    print(f"{iterations} enqueues per run")
+    for name, latencies in [("LPUSH only", baseline), ("Admission check + LPUSH", limited)]:
+        print(f"{name:<25} mean {statistics.mean(latencies):.3f} ms - p50 {percentile(latencies, 50):.3f} ms - "
+              f"p99 {percentile(latencies, 99):.3f} ms")
+    print(f"Added latency: mean {statistics.mean(limited) - statistics.mean(baseline):.3f} ms - "
+          f"p50 {percentile(limited, 50) - percentile(baseline, 50):.3f} ms - "
+          f"p99 {percentile(limited, 99) - percentile(baseline, 99):.3f} ms")
+
+
+if __name__ == "__main__":
+    __main__()
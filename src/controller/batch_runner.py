@@ -0,0 +1,272 @@
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def _run(docker_controller, image, name=None):
+    return docker_controller.run_container(image, name=name, stream_logs=False)
+
+
+def _stop(docker_controller, container):
+    return docker_controller.stop_container(container)
+
+
+def _remove(docker_controller, container):
+    return docker_controller.remove_container(container)
+
+
+def _build(docker_controller, path, tag, dockerfile=None):
+    return docker_controller.build_image(path, tag, dockerfile=dockerfile)
+
+
+def _compose_up(docker_controller, directory):
+    return docker_controller.docker_compose_up_build(directory, detach=True)
+
+
+def _create_secret(docker_controller, name, data):
+    return docker_controller.create_secret(name, data)
+
+
+# action name -> (function, required parameters, optional parameters)
+BATCH_ACTIONS = {
+    "run": (_run, {"image"}, {"name"}),
+    "stop": (_stop, {"container"}, set()),
+    "remove": (_remove, {"container"}, set()),
+    "build": (_build, {"path", "tag"}, {"dockerfile"}),
+    "compose_up": (_compose_up, {"directory"}, set()),
+    "create_secret": (_create_secret, {"name", "data"}, set()),
+}
+
+
+def load_plan(plan_path):
+    """
+    Load a batch plan from a JSON or YAML file.
+    :param plan_path: str path of the plan file (.json, .yml or .yaml)
+    :return: dict plan
+    """
+    with open(plan_path) as plan_file:
+        if plan_path.endswith((".yml", ".yaml")):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError("PyYAML is required to read YAML plans. Install it or use a JSON plan.")
+            try:
+                return yaml.safe_load(plan_file)
+            except yaml.YAMLError as e:
+                raise ValueError(f"Invalid YAML: {e}")
+        # json.JSONDecodeError is a ValueError too
+        return json.load(plan_file)
+
+
+class BatchStep:
+    def __init__(self, step_id, action, params, depends_on):
+        """
+        A single operation of a batch plan.
+        :param step_id: str unique ID of the step
+        :param action: str name of the action (one of BATCH_ACTIONS)
+        :param params: dict parameters of the action
+        :param depends_on: list of str IDs of the steps that must succeed before this one runs
+        :return: None
+        """
+        self.id = step_id
+        self.action = action
+        self.params = params
+        self.depends_on = depends_on
+        self.status = "pending"
+        self.start_time = None
+        self.end_time = None
+        self.error = None
+
+
+class BatchRunner:
+    def __init__(self, docker_controller, plan, max_workers=None):
+        """
+        Run the steps of a batch plan, running steps that don't depend on each other concurrently.
+        :param docker_controller: DockerController to run the operations with
+        :param plan: dict plan with a "steps" list and optionally "max_workers"
+        :param max_workers: int maximum number of steps to run at the same time, overriding the plan's value
+        :return: None
+        """
+        if not isinstance(plan, dict):
+            raise ValueError("The plan must be a mapping with a 'steps' list.")
+        steps = plan.get("steps", [])
+        if not isinstance(steps, list):
+            raise ValueError("The plan's 'steps' must be a list.")
+        max_workers = max_workers or plan.get("max_workers", 4)
+        # bool is an int too, but "max_workers: yes" is a mistake
+        if not isinstance(max_workers, int) or isinstance(max_workers, bool) or max_workers < 1:
+            raise ValueError(f"'max_workers' must be a positive integer, not {max_workers!r}.")
+        self.docker_controller = docker_controller
+        self.max_workers = max_workers
+        self.steps = {}
+        for step in steps:
+            if not isinstance(step, dict):
+                raise ValueError(f"Step {step!r} must be a mapping.")
+            step_id = str(step.get("id", ""))
+            if not step_id:
+                raise ValueError(f"Step {step} has no 'id'.")
+            if step_id in self.steps:
+                raise ValueError(f"Duplicate step id '{step_id}'.")
+            params = step.get("params") or {}
+            if not isinstance(params, dict):
+                raise ValueError(f"Step '{step_id}' has 'params' that aren't a mapping.")
+            self.steps[step_id] = BatchStep(step_id, step.get("action"), params,
+                                            self._parse_depends_on(step_id, step.get("depends_on")))
+        self._validate()
+        self.dependents = {step_id: [] for step_id in self.steps}
+        for step in self.steps.values():
+            for dependency in step.depends_on:
+                self.dependents[dependency].append(step.id)
+
+    @staticmethod
+    def _parse_depends_on(step_id, depends_on):
+        """
+        Read the dependencies of a step, which can be a single step ID or a list of them.
+        :param step_id: str ID of the step
+        :param depends_on: str, list or None dependencies from the plan
+        :return: list of str IDs of the steps depended on, without duplicates
+        """
+        if not depends_on:
+            return []
+        if isinstance(depends_on, (str, int)):
+            depends_on = [depends_on]
+        if not isinstance(depends_on, list):
+            raise ValueError(f"Step '{step_id}' has 'depends_on' that isn't a step ID or a list of them.")
+        # a dependency listed twice would otherwise be waited for twice
+        return list(dict.fromkeys(str(dependency) for dependency in depends_on))
+
+    def _validate(self):
+        """
+        Check every step has a known action with the right parameters, depends on existing steps and that the
+        dependencies have no cycles.
+        :return: None
+        """
+        for step in self.steps.values():
+            if not isinstance(step.action, str) or step.action not in BATCH_ACTIONS:
+                raise ValueError(f"Step '{step.id}' has unknown action '{step.action}'. "
+                                 f"Available actions are: {', '.join(BATCH_ACTIONS)}")
+            _, required_params, optional_params = BATCH_ACTIONS[step.action]
+            missing_params = required_params - step.params.keys()
+            if missing_params:
+                raise ValueError(f"Step '{step.id}' is missing parameters: {', '.join(sorted(missing_params))}")
+            unknown_params = step.params.keys() - required_params - optional_params
+            if unknown_params:
+                raise ValueError(f"Step '{step.id}' has unknown parameters: {', '.join(sorted(unknown_params))}")
+            for dependency in step.depends_on:
+                if dependency not in self.steps:
+                    raise ValueError(f"Step '{step.id}' depends on unknown step '{dependency}'.")
+
+        # Kahn's algorithm: if not every step can be ordered, there is a cycle
+        remaining = {step.id: len(step.depends_on) for step in self.steps.values()}
+        ready = [step_id for step_id, count in remaining.items() if count == 0]
+        ordered = 0
+        while ready:
+            step_id = ready.pop()
+            ordered += 1
+            for step in self.steps.values():
+                if step_id in step.depends_on:
+                    remaining[step.id] -= 1
+                    if remaining[step.id] == 0:
+                        ready.append(step.id)
+        if ordered != len(self.steps):
+            cycle = [step_id for step_id, count in remaining.items() if count > 0]
+            raise ValueError(f"The dependencies between these steps have a cycle: {', '.join(cycle)}")
+
+    def _run_step(self, step):
+        """
+        Run a single step, recording its timing and result.
+        :param step: BatchStep to run
+        :return: None
+        """
+        function = BATCH_ACTIONS[step.action][0]
+        step.status = "running"
+        step.start_time = time.perf_counter()
+        try:
+            function(self.docker_controller, **step.params)
+            step.status = "succeeded"
+        except Exception as e:
+            step.status = "failed"
+            step.error = str(e)
+        finally:
+            step.end_time = time.perf_counter()
+
+    def _skip_dependents(self, step_id):
+        """
+        Skip every step that depends (directly or not) on a step that didn't succeed.
+        :param step_id: str ID of the step that didn't succeed
+        :return: None
+        """
+        for dependent_id in self.dependents[step_id]:
+            dependent = self.steps[dependent_id]
+            if dependent.status == "pending":
+                dependent.status = "skipped"
+                dependent.error = f"Dependency '{step_id}' did not succeed."
+                self._skip_dependents(dependent_id)
+
+    def run(self):
+        """
+        Run the plan.
+        :return: dict timing report
+        """
+        start_time = time.perf_counter()
+        remaining = {step.id: len(step.depends_on) for step in self.steps.values()}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._run_step, step): step
+                       for step in self.steps.values() if not step.depends_on}
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = futures.pop(future)
+                    print(f"Step '{step.id}' ({step.action}) {step.status}"
+                          f"{': ' + step.error if step.error else ''}")
+                    if step.status != "succeeded":
+                        self._skip_dependents(step.id)
+                        continue
+                    for dependent_id in self.dependents[step.id]:
+                        remaining[dependent_id] -= 1
+                        dependent = self.steps[dependent_id]
+                        if remaining[dependent_id] == 0 and dependent.status == "pending":
+                            futures[executor.submit(self._run_step, dependent)] = dependent
+        end_time = time.perf_counter()
+
+        return {
+            "max_workers": self.max_workers,
+            "succeeded": all(step.status == "succeeded" for step in self.steps.values()),
+            "total_seconds": round(end_time - start_time, 3),
+            "steps": [{
+                "id": step.id,
+                "action": step.action,
+                "depends_on": step.depends_on,
+                "status": step.status,
+                "start_seconds": round(step.start_time - start_time, 3) if step.start_time else None,
+                "duration_seconds": round(step.end_time - step.start_time, 3) if step.start_time else None,
+                "error": step.error,
+            } for step in self.steps.values()],
+        }
+
+
+def run_batch(plan_path, report_path=None, max_workers=None):
+    """
+    Run a batch plan with a new DockerController and output its timing report.
+    :param plan_path: str path of the plan file
+    :param report_path: str path to write the JSON timing report to, or None to print it
+    :param max_workers: int maximum number of steps to run at the same time, overriding the plan's value
+    :return: bool indicating whether every step succeeded
+    """
+    from src.controller.docker_controller import DockerController
+    try:
+        plan = load_plan(plan_path)
+        runner = BatchRunner(DockerController(), plan, max_workers)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Failed to load batch plan '{plan_path}': {e}")
+        return False
+    report = runner.run()
+    report["plan"] = os.path.abspath(plan_path)
+    if report_path:
+        with open(report_path, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+        print(f"Timing report written to {report_path}")
+    else:
+        print(json.dumps(report, indent=2))
+    return report["succeeded"]
@@ -0,0 +1,181 @@
+import threading
+import time
+
+# Docker container events and the state the container is in after each of them.
+# "destroy" is handled separately as it removes the container from the cache.
+EVENT_STATUSES = {
+    "create": "created",
+    "start": "running",
+    "restart": "running",
+    "unpause": "running",
+    "pause": "paused",
+    "die": "exited",
+    "stop": "exited",
+}
+
+
+class ContainerState:
+    def __init__(self, container_id, name, image, status):
+        """
+        Lightweight snapshot of a Docker container, so listing containers doesn't need any API calls.
+        :param container_id: str full ID of the container
+        :param name: str name of the container
+        :param image: str image name (or ID) the container was created from
+        :param status: str status of the container (one of the DockerContainerStatus values)
+        :return: None
+        """
+        self.id = container_id
+        self.short_id = container_id[:12]
+        self.name = name
+        self.image = image
+        self.status = status
+
+    def __repr__(self):
+        return f"ContainerState({self.short_id}, {self.name}, {self.image}, {self.status})"
+
+
+class ContainerCache:
+    def __init__(self, client):
+        """
+        Live cache of container states. It is seeded with a single list call and then kept up to date from the Docker
+        events stream in a background thread.
+        :param client: docker.DockerClient to read the containers and events from
+        :return: None
+        """
+        self.client = client
+        self._containers = {}
+        self._version = 0
+        self._changed = threading.Condition()
+        self._events = None
+        self._is_running = False
+        self._thread = None
+
+    def start(self):
+        """
+        Seed the cache and start following the events stream in the background.
+        :return: None
+        """
+        if self._is_running:
+            return
+        self._is_running = True
+        self._subscribe()
+        self._thread = threading.Thread(target=self._follow_events, name="docker-events", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop following the events stream.
+        :return: None
+        """
+        self._is_running = False
+        if self._events is not None:
+            self._events.close()
+
+    def _subscribe(self):
+        """
+        Open the events stream and seed the cache. The stream is opened first so no event between the list call and
+        the subscription is missed; events already reflected in the listing just set the same state again.
+        :return: None
+        """
+        self._events = self.client.events(decode=True, filters={"type": "container"})
+        containers = {}
+        for entry in self.client.api.containers(all=True):
+            names = entry.get("Names") or [""]
+            containers[entry["Id"]] = ContainerState(entry["Id"], names[0].lstrip("/"), entry.get("Image", ""),
+                                                     entry.get("State", ""))
+        with self._changed:
+            self._containers = containers
+            self._notify()
+
+    def _follow_events(self):
+        """
+        Apply the events from the stream to the cache, re-subscribing if the connection to Docker drops.
+        :return: None
+        """
+        while self._is_running:
+            try:
+                for event in self._events:
+                    self.apply_event(event)
+            except Exception as e:
+                if not self._is_running:
+                    return
+                print(f"Lost the Docker events stream ({e}). Reconnecting...")
+            if not self._is_running:
+                return
+            time.sleep(2)
+            try:
+                self._subscribe()
+            except Exception as e:
+                print(f"Failed to reconnect to the Docker events stream: {e}")
+
+    def apply_event(self, event):
+        """
+        Update the cache from a single Docker container event.
+        :param event: dict decoded Docker event
+        :return: None
+        """
+        action = event.get("Action") or event.get("status") or ""
+        # exec events come through as e.g. "exec_start: sh" and don't change the container state
+        action = action.split(":")[0]
+        actor = event.get("Actor", {})
+        container_id = actor.get("ID") or event.get("id")
+        attributes = actor.get("Attributes", {})
+        if not container_id:
+            return
+
+        with self._changed:
+            if action == "destroy":
+                if self._containers.pop(container_id, None) is not None:
+                    self._notify()
+                return
+
+            state = self._containers.get(container_id)
+            if action == "rename" and state:
+                state.name = attributes.get("name", state.name)
+                self._notify()
+                return
+
+            status = EVENT_STATUSES.get(action)
+            if not status:
+                return
+            if state is None:
+                state = ContainerState(container_id, attributes.get("name", ""), attributes.get("image", ""), status)
+                self._containers[container_id] = state
+            state.status = status
+            self._notify()
+
+    def _notify(self):
+        """
+        Bump the cache version and wake up anyone waiting for a change. Must be called holding the lock.
+        :return: None
+        """
+        self._version += 1
+        self._changed.notify_all()
+
+    def list_containers(self, is_all=False, status=None):
+        """
+        List the cached containers without calling the Docker API.
+        :param is_all: bool indicating whether to list all containers or only running ones
+        :param status: list of DockerContainerStatus to filter by
+        :return: list of ContainerState
+        """
+        with self._changed:
+            containers = list(self._containers.values())
+        if status:
+            statuses = {curr_status.value for curr_status in status}
+            return [c for c in containers if c.status in statuses]
+        if not is_all:
+            return [c for c in containers if c.status == "running"]
+        return containers
+
+    def wait_for_change(self, version=None, timeout=None):
+        """
+        Block until the cache changes from the given version.
+        :param version: int version previously returned, or None to return the current version straight away
+        :param timeout: float maximum number of seconds to wait
+        :return: int current version of the cache
+        """
+        with self._changed:
+            if version is not None:
+                self._changed.wait_for(lambda: self._version != version, timeout=timeout)
+            return self._version
@@ -1,12 +1,15 @@
 import os
 import platform
 import subprocess
+import threading
 import time
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 
-import docker
-from docker.errors import DockerException
+from src.controller.container_cache import ContainerCache
+from src.controller.image_analysis import ImageLayerAnalysis, ImageLayers, chain_ids, layer_sizes
+from src.controller.stats_sampler import StatsSampler
 
 
 class DockerContainerStatus(Enum):
@@ -22,16 +25,92 @@ class DockerContainerStatus(Enum):
 class DockerController:
     def __init__(self):
         """
-        Initialise the Docker controller, starting Docker if it's not running.
+        Initialise the Docker controller. The connection to the Docker daemon (including starting Docker if it's not
+        running) happens in a background thread so that the menus can render straight away.
+        :return: None
+        """
+        self._client = None
+        self._client_error = None
+        self._client_ready = threading.Event()
+        self._container_cache = None
+        self._container_cache_lock = threading.Lock()
+        threading.Thread(target=self._connect, name="docker-connect", daemon=True).start()
+
+    @property
+    def client(self):
+        """
+        Get the Docker client, blocking until the background connection has finished.
+        :return: docker.DockerClient
+        """
+        if not self._client_ready.is_set():
+            print("Waiting for the Docker connection...")
+            self._client_ready.wait()
+        if self._client_error:
+            raise self._client_error
+        return self._client
+
+    @property
+    def container_cache(self):
+        """
+        Get the live container cache, seeding it and starting to follow the Docker events on first use.
+        :return: ContainerCache
+        """
+        with self._container_cache_lock:
+            if self._container_cache is None:
+                container_cache = ContainerCache(self.client)
+                container_cache.start()
+                self._container_cache = container_cache
+        return self._container_cache
+
+    def create_stats_sampler(self, history_size=120, max_streams=200):
+        """
+        Create a stats sampler with its own Docker connection pool, big enough to keep a stats stream open to every
+        container at once.
+        :param history_size: int number of samples to keep per container
+        :param max_streams: int maximum number of containers expected to be sampled at once
+        :return: StatsSampler
+        """
+        import docker
+        # make sure Docker is running before connecting the sampler
+        self.client.ping()
+        return StatsSampler(docker.from_env(max_pool_size=max_streams), history_size=history_size)
+
+    def is_client_ready(self):
+        """
+        Check whether the background connection to Docker has finished (successfully or not).
+        :return: bool indicating if the client is ready
+        """
+        return self._client_ready.is_set()
+
+    def _connect(self):
+        """
+        Connect to the Docker daemon, starting Docker if it's not running.
+        The docker package is imported here rather than at module level as it is slow to import.
         :return: None
         """
         try:
-            self.client = docker.from_env()
-            self.client.ping()
-        except DockerException:
-            print("Docker is not running. Attempting to start Docker...")
-            self._start_docker()
-            self._wait_for_docker()
+            from docker.errors import DockerException
+            try:
+                self._client = self._create_client()
+            except DockerException:
+                print("Docker is not running. Attempting to start Docker...")
+                self._start_docker()
+                self._wait_for_docker()
+        except Exception as e:
+            self._client_error = e
+        finally:
+            self._client_ready.set()
+
+    @staticmethod
+    def _create_client():
+        """
+        Create a Docker client from the environment and check the daemon is responding.
+        :return: docker.DockerClient
+        """
+        import docker
+        client = docker.from_env()
+        client.ping()
+        return client
 
     def _start_docker(self):
         """
@@ -53,25 +132,31 @@ class DockerController:
         Wait for Docker to become available.
         :return: None
         """
+        from docker.errors import DockerException
         print("Waiting for Docker to start...")
         for _ in range(15):  # wait for 30s
             try:
-                self.client = docker.from_env()
-                self.client.ping()
+                self._client = self._create_client()
                 print("Docker started successfully.")
                 return
             except DockerException:
                 time.sleep(2)
         raise RuntimeError("Docker did not start in a reasonable time. Please start it manually.")
 
-    def list_containers(self, is_all=False, status=None):
+    def list_containers(self, is_all=False, status=None, labels=None, name=None):
         """
         List all containers.
         :param is_all: bool indicating whether to list all containers or only running ones
         :param status: list of DockerContainerStatus to filter by
+        :param labels: list of str labels ("key" or "key=value") the containers must have
+        :param name: str name (or part of the name) to filter by
         :return: list of Docker containers
         """
         filters = {}
+        if labels:
+            filters["label"] = labels
+        if name:
+            filters["name"] = name
         containers = []
         if status:
             for curr_status in status:
@@ -108,13 +193,18 @@ class DockerController:
         container = self.client.containers.get(container_id)
         container.remove()
 
-    def run_container(self, image_name):
+    def run_container(self, image_name, name=None, stream_logs=True):
         """
         Run a new Docker container with the specified image and output its logs.
         :param image_name: str name of the Docker image
+        :param name: str name for the container, or None to let Docker pick one
+        :param stream_logs: bool indicating whether to stream the container's logs until it stops
         :return: Docker container object
         """
-        container = self.client.containers.run(image_name, detach=True)
+        container = self.client.containers.run(image_name, name=name, detach=True)
+        if not stream_logs:
+            print(f"Started container {container.short_id} from image '{image_name}'.")
+            return container
         print(f"Started container {container.short_id} from image '{image_name}'. Streaming logs:")
         try:
             for log in container.logs(stream=True):
@@ -123,6 +213,23 @@ class DockerController:
             print(f"Error streaming logs: {e}")
         return container
 
+    def clone_container(self, container_id, name, labels=None):
+        """
+        Run a new container with the same image, environment and network as an existing one.
+        :param container_id: str ID or name of the container to copy
+        :param name: str name for the new container
+        :param labels: dict of labels to add to the new container
+        :return: Docker container object
+        """
+        template = self.client.containers.get(container_id)
+        config = template.attrs["Config"]
+        networks = list(template.attrs["NetworkSettings"]["Networks"])
+        container = self.client.containers.run(config["Image"], name=name, environment=config.get("Env"),
+                                               network=networks[0] if networks else None, labels=labels or {},
+                                               detach=True)
+        print(f"Started container {container.short_id} ({name}) from '{template.name}'.")
+        return container
+
     def run_command_in_container(self, container_id, command):
         """
         Run a command in a specified Docker container by opening a new terminal window for full interactivity.
@@ -177,10 +284,11 @@ end tell'''
         Check if Docker Swarm mode is active.
         :return: bool indicating if Swarm mode is active
         """
+        from docker.errors import APIError
         try:
             swarm_info = self.client.swarm.attrs
             return True if swarm_info else False
-        except docker.errors.APIError:
+        except APIError:
             return False
 
     def create_secret(self, name, data):
@@ -219,6 +327,64 @@ end tell'''
         """
         self.client.images.remove(image_id)
 
+    def analyse_images(self, max_workers=8):
+        """
+        Fetch the layers of every Docker image concurrently and index which images share them.
+        :param max_workers: int maximum number of concurrent requests to the Docker API
+        :return: ImageLayerAnalysis
+        """
+        summaries = self.client.api.images()
+        used_image_ids = {container["ImageID"] for container in self.client.api.containers(all=True)}
+
+        def get_image_layers(summary):
+            image_id = summary["Id"]
+            diff_ids = self.client.api.inspect_image(image_id).get("RootFS", {}).get("Layers") or []
+            history = self.client.api.history(image_id)
+            layers = list(zip(chain_ids(diff_ids), layer_sizes(history, diff_ids)))
+            return ImageLayers(image_id, summary.get("RepoTags"), layers, image_id in used_image_ids)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            images = list(executor.map(get_image_layers, summaries))
+        return ImageLayerAnalysis(images)
+
+    def prune_images(self, images, dry_run=True):
+        """
+        Remove several Docker images, in the given order.
+        An image with several tags can't be removed by ID without forcing it, so tagged images are untagged one tag at
+        a time instead, and Docker removes the image with its last tag.
+        :param images: list of ImageLayers of the Docker images
+        :param dry_run: bool indicating whether to only report what would be removed
+        :return: list of (image ID, error message or None) tuples
+        """
+        from docker.errors import APIError
+        results = []
+        for image in images:
+            if dry_run:
+                results.append((image.id, None))
+                continue
+            try:
+                for reference in image.tags or [image.id]:
+                    self.client.images.remove(reference)
+                results.append((image.id, None))
+            except APIError as e:
+                results.append((image.id, str(e)))
+        return results
+
+    def build_image(self, path, tag, dockerfile=None):
+        """
+        Build a Docker image.
+        :param path: str path of the build context directory
+        :param tag: str tag for the new Docker image
+        :param dockerfile: str path of the Dockerfile within the build context, or None for 'Dockerfile'
+        :return: Docker image object
+        """
+        print(f"Building Docker image '{tag}'...")
+        image, build_logs = self.client.images.build(path=path, tag=tag, dockerfile=dockerfile, rm=True)
+        for chunk in build_logs:
+            if 'stream' in chunk:
+                print(chunk['stream'].strip())
+        return image
+
     def run_python_program(self, python_path, python_version, image_name):
         """
         Build and run a Docker container that executes a Python program.
@@ -266,16 +432,23 @@ end tell'''
 
         return container
 
-    def docker_compose_up_build(self, directory_path):
+    def docker_compose_up_build(self, directory_path, detach=False):
         """
         Run 'docker-compose up --build' for the specified docker-compose file.
         :param directory_path: The directory containing the docker-compose.yml file
+        :param detach: bool indicating whether to start the containers in the background and return once they're up,
+        instead of streaming their logs until interrupted
         :return: None
         """
         compose_file = os.path.join(directory_path, "docker-compose.yml")
         if not os.path.exists(compose_file):
             raise FileNotFoundError(f"No docker-compose.yml found in {directory_path}")
 
+        if detach:
+            print("Running 'docker-compose up --build --detach'...")
+            subprocess.run(["docker-compose", "-f", compose_file, "up", "--build", "--detach"], check=True)
+            return
+
         print("Running 'docker-compose up --build'...")
         process = subprocess.Popen(
             ["docker-compose", "-f", compose_file, "up", "--build"],
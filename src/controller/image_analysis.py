@@ -0,0 +1,115 @@
+import hashlib
+
+# diff ID of a layer with no content, which instructions like WORKDIR create
+EMPTY_LAYER_DIFF_ID = "sha256:5f70bf18a086007016e948b04aed3b82103a36bea41755b6cddfaf10ace3c6ef"
+
+
+def chain_ids(diff_ids):
+    """
+    Work out the chain ID of each layer of an image. Docker stores layers on disk by chain ID (which depends on the
+    layer and all the layers below it), so two images only share a layer on disk if their chain IDs match.
+    :param diff_ids: list of str layer diff IDs from the image's RootFS, base layer first
+    :return: list of str chain IDs, base layer first
+    """
+    result = []
+    for diff_id in diff_ids:
+        if not result:
+            result.append(diff_id)
+        else:
+            digest = hashlib.sha256(f"{result[-1]} {diff_id}".encode()).hexdigest()
+            result.append(f"sha256:{digest}")
+    return result
+
+
+def layer_sizes(history, diff_ids):
+    """
+    Match the sizes from an image's history to its layers. History entries that didn't create a layer (ENV, CMD, etc.)
+    have a size of 0, and so do layers with no content (e.g. WORKDIR), which are recognised by the digest of an empty
+    tar. The entries with a size are matched in order to the other layers, and any layers left over are given 0 bytes.
+    :param history: list of dict history entries as returned by the Docker API (newest first)
+    :param diff_ids: list of str layer diff IDs from the image's RootFS, base layer first
+    :return: list of int sizes in bytes, base layer first
+    """
+    sizes = iter([entry.get("Size", 0) for entry in reversed(history) if entry.get("Size", 0) > 0])
+    return [0 if diff_id == EMPTY_LAYER_DIFF_ID else next(sizes, 0) for diff_id in diff_ids]
+
+
+class ImageLayers:
+    def __init__(self, image_id, tags, layers, is_used):
+        """
+        The layers of a single Docker image.
+        :param image_id: str ID of the image
+        :param tags: list of str tags of the image
+        :param layers: list of (chain ID, size in bytes) tuples, base layer first
+        :param is_used: bool indicating whether any container (running or not) uses the image
+        :return: None
+        """
+        self.id = image_id
+        self.tags = [tag for tag in (tags or []) if tag != "<none>:<none>"]
+        self.layers = layers
+        self.is_used = is_used
+
+    @property
+    def is_dangling(self):
+        return not self.tags
+
+    @property
+    def size(self):
+        return sum(size for _, size in self.layers)
+
+
+class ImageLayerAnalysis:
+    def __init__(self, images):
+        """
+        Index the layers of all the images to work out which layers are shared and how much space removing images
+        would free.
+        :param images: list of ImageLayers
+        :return: None
+        """
+        self.images = {image.id: image for image in images}
+        self.layer_index = {}
+        self.layer_sizes = {}
+        for image in images:
+            for chain_id, size in image.layers:
+                self.layer_index.setdefault(chain_id, set()).add(image.id)
+                self.layer_sizes[chain_id] = size
+
+    def unique_bytes(self, image_id):
+        """
+        Get the size of the layers only used by the given image, i.e. the space freed by removing it on its own.
+        :param image_id: str ID of the image
+        :return: int number of bytes
+        """
+        return self.reclaimable_bytes([image_id])
+
+    def shared_bytes(self, image_id):
+        """
+        Get the size of the layers the given image shares with other images.
+        :param image_id: str ID of the image
+        :return: int number of bytes
+        """
+        image = self.images[image_id]
+        return sum(size for chain_id, size in set(image.layers) if len(self.layer_index[chain_id]) > 1)
+
+    def reclaimable_bytes(self, image_ids):
+        """
+        Get the space freed by removing all the given images together. A layer is only freed once every image using it
+        is removed.
+        :param image_ids: list of str image IDs
+        :return: int number of bytes
+        """
+        image_ids = set(image_ids)
+        chain_ids_to_check = {chain_id for image_id in image_ids for chain_id, _ in self.images[image_id].layers}
+        return sum(self.layer_sizes[chain_id] for chain_id in chain_ids_to_check
+                   if self.layer_index[chain_id] <= image_ids)
+
+    def prune_candidates(self, include_unused=False):
+        """
+        Get the images that can be pruned, largest reclaimable space first.
+        :param include_unused: bool indicating whether to include tagged images not used by any container, as well as
+        dangling ones
+        :return: list of ImageLayers
+        """
+        candidates = [image for image in self.images.values()
+                      if not image.is_used and (image.is_dangling or include_unused)]
+        return sorted(candidates, key=lambda image: self.unique_bytes(image.id), reverse=True)
@@ -0,0 +1,132 @@
+import threading
+
+from src.controller.kubernetes_informer import Informer, kubernetes_watch
+
+
+class KubernetesController:
+    def __init__(self, core_v1_api=None, apps_v1_api=None, watch_func=kubernetes_watch):
+        """
+        Initialise the Kubernetes controller. Loading the cluster configuration and seeding the pod and deployment
+        caches happens in a background thread so that the menu can render straight away.
+        :param core_v1_api: CoreV1Api to use, or None to create one from the kube config
+        :param apps_v1_api: AppsV1Api to use, or None to create one from the kube config
+        :param watch_func: function used by the informers to watch resources (see Informer)
+        :return: None
+        """
+        self._core_v1_api = core_v1_api
+        self._apps_v1_api = apps_v1_api
+        self._watch_func = watch_func
+        self._pod_informer = None
+        self._deployment_informer = None
+        self._error = None
+        self._ready = threading.Event()
+        threading.Thread(target=self._connect, name="kubernetes-connect", daemon=True).start()
+
+    def _connect(self):
+        """
+        Load the cluster configuration and seed the informer caches.
+        The kubernetes package is imported here rather than at module level as it is slow to import.
+        :return: None
+        """
+        try:
+            if self._core_v1_api is None or self._apps_v1_api is None:
+                from kubernetes import client, config
+                try:
+                    config.load_kube_config()
+                except config.ConfigException:
+                    config.load_incluster_config()
+                self._core_v1_api = self._core_v1_api or client.CoreV1Api()
+                self._apps_v1_api = self._apps_v1_api or client.AppsV1Api()
+
+            self._pod_informer = Informer(self._core_v1_api.list_pod_for_all_namespaces, self._watch_func)
+            self._deployment_informer = Informer(self._apps_v1_api.list_deployment_for_all_namespaces,
+                                                 self._watch_func)
+            self._pod_informer.start()
+            self._deployment_informer.start()
+        except Exception as e:
+            self._error = e
+        finally:
+            self._ready.set()
+
+    def _wait_until_ready(self):
+        """
+        Block until the background connection has finished.
+        :return: None
+        """
+        if not self._ready.is_set():
+            print("Waiting for the Kubernetes connection...")
+            self._ready.wait()
+        if self._error:
+            raise self._error
+
+    @property
+    def pod_informer(self):
+        self._wait_until_ready()
+        return self._pod_informer
+
+    @property
+    def deployment_informer(self):
+        self._wait_until_ready()
+        return self._deployment_informer
+
+    def is_ready(self):
+        """
+        Check whether the background connection to Kubernetes has finished (successfully or not).
+        :return: bool indicating if the controller is ready
+        """
+        return self._ready.is_set()
+
+    def stop(self):
+        """
+        Stop watching the cluster.
+        :return: None
+        """
+        if self._ready.is_set() and not self._error:
+            self._pod_informer.stop()
+            self._deployment_informer.stop()
+
+    def list_pods(self, namespace=None):
+        """
+        List pods from the local cache.
+        :param namespace: str namespace to filter by, or None for all namespaces
+        :return: list of V1Pod
+        """
+        return self.pod_informer.list(namespace)
+
+    def list_deployments(self, namespace=None):
+        """
+        List deployments from the local cache.
+        :param namespace: str namespace to filter by, or None for all namespaces
+        :return: list of V1Deployment
+        """
+        return self.deployment_informer.list(namespace)
+
+    def get_deployment(self, key):
+        """
+        Get a deployment from the local cache.
+        :param key: str "namespace/name" of the deployment
+        :return: V1Deployment, or None if it doesn't exist
+        """
+        return self.deployment_informer.get(key)
+
+    def scale_deployment(self, key, replicas):
+        """
+        Scale a deployment. The cache is updated by the watch once the API server applies the change.
+        :param key: str "namespace/name" of the deployment
+        :param replicas: int number of replicas
+        :return: None
+        """
+        self._wait_until_ready()
+        namespace, name = key.split("/", 1)
+        self._apps_v1_api.patch_namespaced_deployment_scale(name, namespace, {"spec": {"replicas": replicas}})
+
+    def get_pod_logs(self, key, tail_lines=100):
+        """
+        Get the logs of a pod.
+        :param key: str "namespace/name" of the pod
+        :param tail_lines: int number of lines to get from the end of the logs
+        :return: str logs
+        """
+        self._wait_until_ready()
+        namespace, name = key.split("/", 1)
+        return self._core_v1_api.read_namespaced_pod_log(name, namespace, tail_lines=tail_lines)
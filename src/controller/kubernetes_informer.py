@@ -0,0 +1,168 @@
+import threading
+import time
+
+
+def kubernetes_watch(list_func, resource_version, timeout_seconds):
+    """
+    Watch a Kubernetes resource using the kubernetes client, starting from the given resourceVersion.
+    :param list_func: the kubernetes client list function of the resource (e.g. CoreV1Api.list_pod_for_all_namespaces)
+    :param resource_version: str resourceVersion to resume watching from
+    :param timeout_seconds: int number of seconds before the API server closes the watch
+    :return: iterator of watch event dicts with "type" and "object" keys
+    """
+    from kubernetes import watch
+    return watch.Watch().stream(list_func, resource_version=resource_version, timeout_seconds=timeout_seconds,
+                                allow_watch_bookmarks=True)
+
+
+def object_key(obj):
+    """
+    Get the cache key of a Kubernetes object.
+    :param obj: Kubernetes object with metadata
+    :return: str "namespace/name"
+    """
+    return f"{obj.metadata.namespace}/{obj.metadata.name}"
+
+
+class ResourceVersionExpired(Exception):
+    pass
+
+
+class Informer:
+    def __init__(self, list_func, watch_func=kubernetes_watch, timeout_seconds=300):
+        """
+        Local cache of a Kubernetes resource. It is seeded with a single LIST and then kept current through WATCH,
+        resuming from the last resourceVersion seen whenever the watch ends so no changes are missed.
+        :param list_func: function listing the resource, returning an object with items and metadata.resource_version
+        :param watch_func: function(list_func, resource_version, timeout_seconds) returning an iterator of watch events
+        :param timeout_seconds: int number of seconds before each watch request is closed and resumed
+        :return: None
+        """
+        self.list_func = list_func
+        self.watch_func = watch_func
+        self.timeout_seconds = timeout_seconds
+        self.resource_version = None
+        self._objects = {}
+        self._version = 0
+        self._changed = threading.Condition()
+        self._is_running = False
+        self._thread = None
+
+    def start(self):
+        """
+        Seed the cache and start watching for changes in the background.
+        :return: None
+        """
+        if self._is_running:
+            return
+        self._is_running = True
+        self._relist()
+        self._thread = threading.Thread(target=self._watch, name="kubernetes-informer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop watching for changes. The watch request can't be interrupted, so it finishes in the background after the
+        next event or once it times out; informers are meant to live as long as the application.
+        :return: None
+        """
+        self._is_running = False
+
+    def _relist(self):
+        """
+        Replace the cache with a full LIST of the resource.
+        :return: None
+        """
+        result = self.list_func()
+        with self._changed:
+            self._objects = {object_key(obj): obj for obj in result.items}
+            self.resource_version = result.metadata.resource_version
+            self._notify()
+
+    def _watch(self):
+        """
+        Apply the WATCH events to the cache, resuming from the last resourceVersion when the watch ends and re-listing
+        if that resourceVersion has expired.
+        :return: None
+        """
+        while self._is_running:
+            try:
+                for event in self.watch_func(self.list_func, self.resource_version, self.timeout_seconds):
+                    if not self._is_running:
+                        return
+                    self.apply_event(event)
+            except Exception as e:
+                if not self._is_running:
+                    return
+                try:
+                    if isinstance(e, ResourceVersionExpired) or getattr(e, "status", None) == 410:
+                        self._relist()
+                    else:
+                        print(f"Kubernetes watch failed ({e}). Resuming...")
+                        time.sleep(2)
+                except Exception as relist_error:
+                    print(f"Failed to re-list Kubernetes resources: {relist_error}")
+                    time.sleep(2)
+
+    def apply_event(self, event):
+        """
+        Update the cache from a single watch event.
+        :param event: dict watch event with "type" and "object" keys
+        :return: None
+        """
+        event_type = event["type"]
+        obj = event["object"]
+        if event_type == "ERROR":
+            code = obj.get("code") if isinstance(obj, dict) else getattr(obj, "code", None)
+            if code == 410:
+                raise ResourceVersionExpired("resourceVersion too old")
+            raise RuntimeError(f"Kubernetes watch error: {obj}")
+
+        with self._changed:
+            self.resource_version = obj.metadata.resource_version
+            if event_type == "BOOKMARK":
+                return
+            if event_type == "DELETED":
+                self._objects.pop(object_key(obj), None)
+            else:
+                self._objects[object_key(obj)] = obj
+            self._notify()
+
+    def _notify(self):
+        """
+        Bump the cache version and wake up anyone waiting for a change. Must be called holding the lock.
+        :return: None
+        """
+        self._version += 1
+        self._changed.notify_all()
+
+    def list(self, namespace=None):
+        """
+        List the cached objects without calling the API server.
+        :param namespace: str namespace to filter by, or None for all namespaces
+        :return: list of Kubernetes objects sorted by namespace and name
+        """
+        with self._changed:
+            objects = sorted(self._objects.items())
+        return [obj for _, obj in objects if namespace is None or obj.metadata.namespace == namespace]
+
+    def get(self, key):
+        """
+        Get a cached object without calling the API server.
+        :param key: str "namespace/name" of the object
+        :return: Kubernetes object, or None if it isn't in the cache
+        """
+        with self._changed:
+            return self._objects.get(key)
+
+    def wait_for_change(self, version=None, timeout=None):
+        """
+        Block until the cache changes from the given version.
+        :param version: int version previously returned, or None to return the current version straight away
+        :param timeout: float maximum number of seconds to wait
+        :return: int current version of the cache
+        """
+        with self._changed:
+            if version is not None:
+                self._changed.wait_for(lambda: self._version != version, timeout=timeout)
+            return self._version
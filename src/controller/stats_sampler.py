@@ -0,0 +1,274 @@
+import csv
+import threading
+import time
+from array import array
+
+# Metrics kept for every container, in the order they are exported
+STATS_METRICS = ["cpu_percent", "memory_bytes", "memory_percent", "net_rx_rate", "net_tx_rate", "block_read_rate",
+                 "block_write_rate"]
+
+
+class RingBuffer:
+    def __init__(self, capacity):
+        """
+        Fixed-size buffer of floats backed by an array, overwriting the oldest value once it's full.
+        :param capacity: int maximum number of values kept
+        :return: None
+        """
+        self.capacity = capacity
+        self._values = array('d', bytes(8 * capacity))
+        self._start = 0
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    def append(self, value):
+        """
+        Add a value, overwriting the oldest one if the buffer is full.
+        :param value: float value to add
+        :return: None
+        """
+        end = (self._start + self._length) % self.capacity
+        self._values[end] = value
+        if self._length < self.capacity:
+            self._length += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+
+    def latest(self, default=0.0):
+        """
+        Get the most recent value.
+        :param default: float value to return if the buffer is empty
+        :return: float most recent value
+        """
+        if not self._length:
+            return default
+        return self._values[(self._start + self._length - 1) % self.capacity]
+
+    def values(self):
+        """
+        Get the values, oldest first.
+        :return: list of float
+        """
+        end = self._start + self._length
+        if end <= self.capacity:
+            return self._values[self._start:end].tolist()
+        return (self._values[self._start:] + self._values[:end - self.capacity]).tolist()
+
+
+class ContainerStats:
+    def __init__(self, container_id, name, history_size):
+        """
+        Stats history of a single container. Rates are worked out from the difference with the previous sample.
+        :param container_id: str ID of the container
+        :param name: str name of the container
+        :param history_size: int number of samples to keep
+        :return: None
+        """
+        self.id = container_id
+        self.name = name
+        self.timestamps = RingBuffer(history_size)
+        self.metrics = {metric: RingBuffer(history_size) for metric in STATS_METRICS}
+        self._lock = threading.Lock()
+        self._previous_time = None
+        self._previous_counters = None
+
+    def add_sample(self, stats, sample_time=None):
+        """
+        Add a sample from the Docker stats API.
+        :param stats: dict decoded stats sample
+        :param sample_time: float monotonic time the sample was received, or None for now
+        :return: None
+        """
+        sample_time = time.monotonic() if sample_time is None else sample_time
+
+        cpu_stats = stats.get("cpu_stats") or {}
+        precpu_stats = stats.get("precpu_stats") or {}
+        cpu_delta = (cpu_stats.get("cpu_usage", {}).get("total_usage", 0)
+                     - precpu_stats.get("cpu_usage", {}).get("total_usage", 0))
+        system_delta = cpu_stats.get("system_cpu_usage", 0) - precpu_stats.get("system_cpu_usage", 0)
+        online_cpus = (cpu_stats.get("online_cpus")
+                       or len(cpu_stats.get("cpu_usage", {}).get("percpu_usage") or []) or 1)
+        # the first sample of a stream has no previous CPU usage to compare with
+        has_previous_cpu = bool(precpu_stats.get("system_cpu_usage"))
+        cpu_percent = (cpu_delta / system_delta * online_cpus * 100
+                       if has_previous_cpu and cpu_delta > 0 and system_delta > 0 else 0.0)
+
+        memory_stats = stats.get("memory_stats") or {}
+        # the page cache can be reclaimed, so it isn't counted as used (cgroup v1 uses "cache", v2 "inactive_file")
+        memory_cache = (memory_stats.get("stats") or {}).get("inactive_file",
+                                                             (memory_stats.get("stats") or {}).get("cache", 0))
+        memory_bytes = max(memory_stats.get("usage", 0) - memory_cache, 0)
+        memory_limit = memory_stats.get("limit", 0)
+        memory_percent = memory_bytes / memory_limit * 100 if memory_limit else 0.0
+
+        networks = (stats.get("networks") or {}).values()
+        block_io = (stats.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []
+        counters = (
+            sum(network.get("rx_bytes", 0) for network in networks),
+            sum(network.get("tx_bytes", 0) for network in networks),
+            sum(entry.get("value", 0) for entry in block_io if entry.get("op", "").lower() == "read"),
+            sum(entry.get("value", 0) for entry in block_io if entry.get("op", "").lower() == "write"),
+        )
+
+        with self._lock:
+            if self._previous_counters is None or sample_time <= self._previous_time:
+                rates = (0.0, 0.0, 0.0, 0.0)
+            else:
+                elapsed = sample_time - self._previous_time
+                # counters can go backwards if the container restarts, in which case there is no rate for this sample
+                rates = tuple(max(current - previous, 0) / elapsed
+                              for current, previous in zip(counters, self._previous_counters))
+            self._previous_time = sample_time
+            self._previous_counters = counters
+
+            self.timestamps.append(time.time())
+            for metric, value in zip(STATS_METRICS, (cpu_percent, memory_bytes, memory_percent) + rates):
+                self.metrics[metric].append(value)
+
+    def latest(self):
+        """
+        Get the most recent value of every metric.
+        :return: dict of metric name -> float
+        """
+        with self._lock:
+            return {metric: buffer.latest() for metric, buffer in self.metrics.items()}
+
+    def history(self):
+        """
+        Get the stats history, oldest sample first.
+        :return: list of (timestamp, dict of metric name -> float) tuples
+        """
+        with self._lock:
+            timestamps = self.timestamps.values()
+            metrics = {metric: buffer.values() for metric, buffer in self.metrics.items()}
+        return [(timestamp, {metric: values[i] for metric, values in metrics.items()})
+                for i, timestamp in enumerate(timestamps)]
+
+
+class StatsSampler:
+    def __init__(self, client, history_size=120):
+        """
+        Sample the resource usage of many containers at once, keeping a streaming stats connection open to each of
+        them in its own thread instead of asking for a single sample per container in turn.
+        :param client: docker.DockerClient to stream the stats from (its connection pool should fit every stream),
+        closed when sampling stops
+        :param history_size: int number of samples to keep per container
+        :return: None
+        """
+        self.client = client
+        self.history_size = history_size
+        self.containers = {}
+        # container ID -> token of the thread following its stats, so a thread can tell when it should stop
+        self._streams = {}
+        self._lock = threading.Lock()
+        self._is_running = True
+
+    def sync(self, containers):
+        """
+        Start sampling new containers and stop sampling the ones no longer given.
+        :param containers: list of objects with id and name (e.g. ContainerState of the running containers)
+        :return: None
+        """
+        with self._lock:
+            if not self._is_running:
+                return
+            wanted = {container.id: container.name for container in containers}
+            for container_id in list(self._streams):
+                if container_id not in wanted:
+                    # the thread notices on its next sample and closes the stream itself
+                    del self._streams[container_id]
+            for container_id, name in wanted.items():
+                if container_id not in self._streams:
+                    if container_id not in self.containers:
+                        self.containers[container_id] = ContainerStats(container_id, name, self.history_size)
+                    token = object()
+                    self._streams[container_id] = token
+                    threading.Thread(target=self._follow_stats, args=(container_id, token),
+                                     name=f"stats-{container_id[:12]}", daemon=True).start()
+
+    def _is_current(self, container_id, token):
+        """
+        Check whether a stats thread should keep following its container.
+        :param container_id: str ID of the container
+        :param token: object token the thread was started with
+        :return: bool indicating if the thread is still the one following the container
+        """
+        with self._lock:
+            return self._is_running and self._streams.get(container_id) is token
+
+    def _follow_stats(self, container_id, token):
+        """
+        Stream the stats of a container until it stops, it is no longer synced or sampling is stopped.
+        The stream is a generator the thread is blocked in, so it can only be closed from this thread: it is checked
+        after every sample (Docker sends one a second) and closed once the thread is no longer current.
+        :param container_id: str ID of the container
+        :param token: object token identifying this thread in the streams
+        :return: None
+        """
+        stream = None
+        try:
+            stream = self.client.api.stats(container_id, stream=True, decode=True)
+            container_stats = self.containers[container_id]
+            for stats in stream:
+                if not self._is_current(container_id, token):
+                    break
+                container_stats.add_sample(stats)
+        except Exception:
+            # the stream ends with an error when the container stops or the client is closed
+            pass
+        finally:
+            if stream is not None:
+                try:
+                    stream.close()
+                except Exception:
+                    pass
+            # forget the stream so the next sync starts a new one if the container is still running, unless a newer
+            # thread has already taken its place
+            with self._lock:
+                if self._streams.get(container_id) is token:
+                    del self._streams[container_id]
+
+    def stop(self):
+        """
+        Stop sampling every container and close the Docker client.
+        :return: None
+        """
+        with self._lock:
+            self._is_running = False
+            self._streams.clear()
+        try:
+            self.client.close()
+        except Exception:
+            pass
+
+    def top(self, sort_by="cpu_percent"):
+        """
+        Get the latest stats of every sampled container, highest first.
+        :param sort_by: str metric to sort by
+        :return: list of (ContainerStats, dict of metric name -> float) tuples
+        """
+        with self._lock:
+            containers = [self.containers[container_id] for container_id in self._streams]
+        rows = [(container_stats, container_stats.latest()) for container_stats in containers]
+        return sorted(rows, key=lambda row: row[1][sort_by], reverse=True)
+
+    def export_csv(self, file_path):
+        """
+        Export the stats history of every sampled container to a CSV file.
+        :param file_path: str path of the CSV file
+        :return: int number of rows written
+        """
+        with self._lock:
+            containers = list(self.containers.values())
+        rows = 0
+        with open(file_path, "w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(["timestamp", "container_id", "name"] + STATS_METRICS)
+            for container_stats in containers:
+                for timestamp, metrics in container_stats.history():
+                    writer.writerow([f"{timestamp:.3f}", container_stats.id, container_stats.name]
+                                    + [f"{metrics[metric]:.2f}" for metric in STATS_METRICS])
+                    rows += 1
+        return rows
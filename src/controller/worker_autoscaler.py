@@ -0,0 +1,234 @@
+import math
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from src.controller.docker_controller import DockerContainerStatus
+
+WEATHER_JOBS_QUEUE = "weather_jobs"
+# used instead of the list when the pipeline runs with JOB_TRANSPORT=stream
+WEATHER_JOBS_STREAM = "weather_jobs_stream"
+WEATHER_WORKERS_GROUP = "weather_workers"
+# incremented by the worker every time it finishes a job
+WEATHER_JOBS_PROCESSED = "weather_jobs_processed"
+WORKER_CONTAINER_NAME = "weather_worker"
+AUTOSCALED_WORKER_LABEL = "weather.autoscaled-worker"
+
+
+class ScalingPolicy:
+    def __init__(self, min_replicas=1, max_replicas=5, scale_up_backlog=20, scale_down_backlog=5,
+                 target_drain_seconds=30, scale_up_cooldown=10, scale_down_cooldown=30):
+        """
+        Decide how many workers should run from the queue length and processing rate.
+        Scaling up happens when there are more than scale_up_backlog jobs per worker and the current rate wouldn't
+        drain the queue within target_drain_seconds. Scaling down happens one worker at a time when there are fewer
+        than scale_down_backlog jobs per worker. The gap between the two thresholds and the cooldowns stop the number
+        of workers going up and down on every small change in the queue.
+        :param min_replicas: int minimum number of workers
+        :param max_replicas: int maximum number of workers
+        :param scale_up_backlog: int queued jobs per worker above which workers are added
+        :param scale_down_backlog: int queued jobs per worker below which a worker is removed
+        :param target_drain_seconds: float how quickly the queue should be drained at the current processing rate
+        :param scale_up_cooldown: float seconds to wait after scaling before scaling up again
+        :param scale_down_cooldown: float seconds to wait after scaling before scaling down again
+        :return: None
+        """
+        if not 1 <= min_replicas <= max_replicas:
+            raise ValueError("Expected 1 <= min_replicas <= max_replicas.")
+        if scale_down_backlog >= scale_up_backlog:
+            raise ValueError("scale_down_backlog must be lower than scale_up_backlog.")
+        self.min_replicas = min_replicas
+        self.max_replicas = max_replicas
+        self.scale_up_backlog = scale_up_backlog
+        self.scale_down_backlog = scale_down_backlog
+        self.target_drain_seconds = target_drain_seconds
+        self.scale_up_cooldown = scale_up_cooldown
+        self.scale_down_cooldown = scale_down_cooldown
+        self.last_scale_time = None
+
+    def decide(self, queue_length, processing_rate, replicas, now):
+        """
+        Work out the number of workers that should be running.
+        :param queue_length: int number of queued jobs
+        :param processing_rate: float jobs processed per second by all the workers
+        :param replicas: int number of workers running
+        :param now: float current monotonic time, in seconds
+        :return: (int desired number of workers, str reason)
+        """
+        if replicas < self.min_replicas:
+            return self.min_replicas, f"below the minimum of {self.min_replicas} workers"
+        if replicas > self.max_replicas:
+            return self.max_replicas, f"above the maximum of {self.max_replicas} workers"
+
+        since_last_scale = math.inf if self.last_scale_time is None else now - self.last_scale_time
+        backlog_per_replica = queue_length / replicas
+        drain_seconds = queue_length / processing_rate if processing_rate > 0 else math.inf
+
+        if backlog_per_replica > self.scale_up_backlog and replicas < self.max_replicas:
+            if drain_seconds <= self.target_drain_seconds:
+                return replicas, f"backlog of {queue_length} drains in {drain_seconds:.0f}s at the current rate"
+            if since_last_scale < self.scale_up_cooldown:
+                return replicas, "waiting for the scale up cooldown"
+            desired = min(math.ceil(queue_length / self.scale_up_backlog), self.max_replicas)
+            return desired, f"{backlog_per_replica:.0f} jobs per worker (rate {processing_rate:.1f} jobs/s)"
+
+        if backlog_per_replica < self.scale_down_backlog and replicas > self.min_replicas:
+            if since_last_scale < self.scale_down_cooldown:
+                return replicas, "waiting for the scale down cooldown"
+            return replicas - 1, f"{backlog_per_replica:.1f} jobs per worker"
+
+        return replicas, "within thresholds"
+
+
+class WorkerAutoscaler:
+    def __init__(self, docker_controller, redis_client, policy, interval=2):
+        """
+        Start and stop weather worker containers depending on the length of the weather jobs queue.
+        Extra workers are copies of the weather_worker container started by docker-compose (same image, environment
+        and network), labelled so they can be told apart and removed when scaling down.
+        :param docker_controller: DockerController to manage the worker containers with
+        :param redis_client: redis.Redis connected to the weather pipeline's Redis
+        :param policy: ScalingPolicy deciding the number of workers
+        :param interval: float seconds between checks of the queue
+        :return: None
+        """
+        self.docker_controller = docker_controller
+        self.redis_client = redis_client
+        self.policy = policy
+        self.interval = interval
+        self.processing_rate = 0.0
+        self._last_processed = None
+        self._last_check_time = None
+        # stopping a worker waits for it to finish its current jobs, so workers are removed in the background, in
+        # parallel, and the ones being removed are no longer counted
+        self._removal_executor = ThreadPoolExecutor(max_workers=policy.max_replicas, thread_name_prefix="remove-worker")
+        self._removing = set()
+        self._removing_lock = threading.Lock()
+
+    def get_autoscaled_workers(self):
+        """
+        Get the running worker containers started by the autoscaler, except the ones being removed.
+        :return: list of Docker containers
+        """
+        containers = self.docker_controller.list_containers(status=[DockerContainerStatus.RUNNING],
+                                                            labels=[AUTOSCALED_WORKER_LABEL])
+        with self._removing_lock:
+            return [container for container in containers if container.id not in self._removing]
+
+    def _remove_worker(self, container_id):
+        """
+        Stop and remove an autoscaled worker. The worker finishes its current jobs when asked to stop.
+        :param container_id: str ID of the worker container
+        :return: None
+        """
+        try:
+            self.docker_controller.stop_container(container_id)
+            self.docker_controller.remove_container(container_id)
+        except Exception as e:
+            print(f"Failed to remove weather worker {container_id[:12]}: {e}")
+        finally:
+            with self._removing_lock:
+                self._removing.discard(container_id)
+
+    def remove_workers(self, containers):
+        """
+        Start removing autoscaled workers in the background.
+        :param containers: list of Docker containers of the workers
+        :return: None
+        """
+        with self._removing_lock:
+            self._removing.update(container.id for container in containers)
+        for container in containers:
+            self._removal_executor.submit(self._remove_worker, container.id)
+
+    def count_replicas(self):
+        """
+        Count the running workers, including the one started by docker-compose.
+        :return: int number of running workers
+        """
+        base_workers = self.docker_controller.list_containers(status=[DockerContainerStatus.RUNNING],
+                                                              name=f"^/{WORKER_CONTAINER_NAME}$")
+        return len(base_workers) + len(self.get_autoscaled_workers())
+
+    def _measure(self, now):
+        """
+        Read the queue length and update the processing rate (smoothed over the last few checks).
+        :param now: float current monotonic time, in seconds
+        :return: int queue length
+        """
+        pipeline = self.redis_client.pipeline()
+        pipeline.llen(WEATHER_JOBS_QUEUE)
+        pipeline.get(WEATHER_JOBS_PROCESSED)
+        pipeline.exists(WEATHER_JOBS_STREAM)
+        queue_length, processed, is_stream = pipeline.execute()
+        if is_stream:
+            queue_length += self._get_stream_backlog()
+        processed = int(processed or 0)
+        if self._last_processed is not None and now > self._last_check_time:
+            rate = max(processed - self._last_processed, 0) / (now - self._last_check_time)
+            self.processing_rate = 0.5 * self.processing_rate + 0.5 * rate
+        self._last_processed = processed
+        self._last_check_time = now
+        return queue_length
+
+    def _get_stream_backlog(self):
+        """
+        Get the number of jobs in the weather jobs stream that the workers haven't finished.
+        :return: int jobs not yet delivered to a worker plus jobs delivered but not yet acknowledged
+        """
+        for group in self.redis_client.xinfo_groups(WEATHER_JOBS_STREAM):
+            # Redis can't always tell the lag (e.g. after entries were deleted), in which case the length of the stream
+            # is used instead, like the API's admission check does
+            if group["name"].decode() == WEATHER_WORKERS_GROUP and group.get("lag") is not None:
+                return group["lag"] + group["pending"]
+        return self.redis_client.xlen(WEATHER_JOBS_STREAM)
+
+    def scale_to(self, replicas, current_replicas):
+        """
+        Start or remove autoscaled workers to reach the given number of workers.
+        :param replicas: int number of workers wanted
+        :param current_replicas: int number of workers running
+        :return: None
+        """
+        if replicas > current_replicas:
+            for _ in range(replicas - current_replicas):
+                name = f"{WORKER_CONTAINER_NAME}_autoscaled_{uuid.uuid4().hex[:8]}"
+                self.docker_controller.clone_container(WORKER_CONTAINER_NAME, name, {AUTOSCALED_WORKER_LABEL: "true"})
+        else:
+            self.remove_workers(self.get_autoscaled_workers()[:current_replicas - replicas])
+
+    def step(self):
+        """
+        Check the queue once and scale the workers if needed.
+        :return: (int queue length, int workers before, int workers after, str reason)
+        """
+        now = time.monotonic()
+        queue_length = self._measure(now)
+        replicas = self.count_replicas()
+        desired, reason = self.policy.decide(queue_length, self.processing_rate, replicas, now)
+        if desired != replicas:
+            print(f"[{time.strftime('%H:%M:%S')}] Scaling weather workers {replicas} -> {desired}: {reason} "
+                  f"(queue: {queue_length}, rate: {self.processing_rate:.1f} jobs/s)")
+            self.scale_to(desired, replicas)
+            self.policy.last_scale_time = now
+        return queue_length, replicas, desired, reason
+
+    def run(self):
+        """
+        Keep checking the queue until interrupted with Ctrl+C, then remove the autoscaled workers.
+        :return: None
+        """
+        print("Autoscaling weather workers. Press Ctrl+C to stop.")
+        try:
+            while True:
+                queue_length, _, replicas, reason = self.step()
+                print(f"[{time.strftime('%H:%M:%S')}] Queue: {queue_length} - Workers: {replicas} - "
+                      f"Rate: {self.processing_rate:.1f} jobs/s - {reason}")
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            print("\nStopping the autoscaler and removing the autoscaled workers...")
+        finally:
+            self.remove_workers(self.get_autoscaled_workers())
+            # wait for every worker (including the ones scaled down earlier) to be removed
+            self._removal_executor.shutdown(wait=True)
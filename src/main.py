@@ -1,7 +1,33 @@
+import argparse
+import sys
+
+from src.utils import startup_timer
 from src.view.main_menu import MainMenu
 
+startup_timer.mark("imports")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Docker and Kubernetes management CLI.")
+    parser.add_argument("--startup-timing", nargs="?", const="", default=None, metavar="FILE",
+                        help="report import time and time to first menu on exit; "
+                             "if FILE is given, append the report to it as a JSON line")
+    parser.add_argument("--batch", metavar="PLAN",
+                        help="run the Docker operations in a JSON/YAML plan without any prompts and exit")
+    parser.add_argument("--report", metavar="FILE",
+                        help="with --batch, write the JSON timing report to FILE instead of printing it")
+    parser.add_argument("--workers", type=int, metavar="N",
+                        help="with --batch, maximum number of steps to run at the same time")
+    return parser.parse_args()
+
 
 def __main__():
+    args = parse_args()
+    if args.startup_timing is not None:
+        startup_timer.report_on_exit(args.startup_timing or None)
+    if args.batch:
+        from src.controller.batch_runner import run_batch
+        sys.exit(0 if run_batch(args.batch, args.report, args.workers) else 1)
     MainMenu().run()
 
 
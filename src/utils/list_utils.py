@@ -6,6 +6,24 @@ def list_ordered_list(input_list, list_title):
 
 
 def container_to_string(container, index):
-    image_tags = container.image.tags
-    image = image_tags[0] if image_tags else "N/A"
+    image = container.image or "N/A"
     return f"{index + 1}. ID: {container.short_id} - {container.name}: {image} ({container.status})"
+
+
+def bytes_to_string(size):
+    for unit in ["B", "KB", "MB", "GB"]:
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def pod_to_string(pod, index):
+    node = pod.spec.node_name or "N/A"
+    return f"{index + 1}. {pod.metadata.namespace}/{pod.metadata.name} - Node: {node} ({pod.status.phase})"
+
+
+def deployment_to_string(deployment, index):
+    ready = deployment.status.ready_replicas or 0
+    return (f"{index + 1}. {deployment.metadata.namespace}/{deployment.metadata.name} - "
+            f"Ready: {ready}/{deployment.spec.replicas}")
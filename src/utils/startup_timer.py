@@ -0,0 +1,58 @@
+import atexit
+import json
+import time
+
+# Taken as early as possible so every mark is relative to the application starting
+_START_TIME = time.perf_counter()
+_marks = {}
+
+
+def mark(name):
+    """
+    Record the time elapsed since start-up the first time an event happens. Later calls with the same name are ignored.
+    :param name: str name of the event (e.g. "imports", "first render: Main Menu")
+    :return: None
+    """
+    if name not in _marks:
+        _marks[name] = time.perf_counter() - _START_TIME
+
+
+def get_marks():
+    """
+    Get the recorded start-up marks.
+    :return: dict of event name -> milliseconds since start-up, in the order they happened
+    """
+    return {name: round(elapsed * 1000, 2) for name, elapsed in _marks.items()}
+
+
+def print_report():
+    """
+    Print the start-up timing report.
+    :return: None
+    """
+    print("=== Startup Timing ===")
+    for name, elapsed_ms in get_marks().items():
+        print(f"{elapsed_ms:>10.2f} ms  {name}")
+    print("======================")
+
+
+def write_report(file_path):
+    """
+    Append the start-up timing report as a JSON line so it can be compared between runs.
+    :param file_path: str path of the file to append to
+    :return: None
+    """
+    with open(file_path, "a") as report_file:
+        report_file.write(json.dumps({"timestamp": time.time(), "marks": get_marks()}) + "\n")
+
+
+def report_on_exit(file_path=None):
+    """
+    Output the start-up timing report when the application exits.
+    :param file_path: str path of a file to append the JSON report to, or None to print it to the console
+    :return: None
+    """
+    if file_path:
+        atexit.register(write_report, file_path)
+    else:
+        atexit.register(print_report)
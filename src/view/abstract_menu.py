@@ -1,3 +1,4 @@
+from src.utils import startup_timer
 from src.utils.user_input_handler import get_user_input, InputType
 
 
@@ -29,6 +30,7 @@ class AbstractMenu:
             display_key = 0 if key == 99 else key
             print(f"{display_key}. {self.options[key]}")
         print("===================")
+        startup_timer.mark(f"first render: {self.menu_name}")
 
     def run(self):
         """
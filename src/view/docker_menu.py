@@ -1,9 +1,11 @@
 import os
+import time
 
 from src.controller.docker_controller import DockerController, DockerContainerStatus
 from src.controller.weather_pipeline_controller import WeatherPipelineController
-from src.utils.list_utils import container_to_string, list_ordered_list
-from src.utils.user_input_handler import get_user_input
+from src.controller.worker_autoscaler import ScalingPolicy, WorkerAutoscaler
+from src.utils.list_utils import bytes_to_string, container_to_string, list_ordered_list
+from src.utils.user_input_handler import get_user_input, InputType
 from src.view.abstract_menu import AbstractMenu
 
 
@@ -23,11 +25,21 @@ class DockerMenu(AbstractMenu):
              11: "Remove Image",
              12: "Run Python Program in Container (Docker Requirements 2)",
              13: "Weather Pipeline (Docker Requirements 3)",
+             14: "Watch Containers",
+             15: "Analyse Image Layers",
+             16: "Prune Images",
+             17: "Container Stats",
+             18: "Autoscale Weather Workers",
              20: "Main Menu",
              99: "Exit"}
         super().__init__("Docker Menu", docker_menu_options)
         self.docker_controller = DockerController()
 
+    def display_options(self):
+        if not self.docker_controller.is_client_ready():
+            print("Connecting to Docker in the background...")
+        super().display_options()
+
     def execute_choice(self, choice):
         if choice == 1:
             self.list_containers()
@@ -55,6 +67,16 @@ class DockerMenu(AbstractMenu):
             self.run_python_program()
         elif choice == 13:
             self.weather_pipeline()
+        elif choice == 14:
+            self.watch_containers()
+        elif choice == 15:
+            self.analyse_image_layers()
+        elif choice == 16:
+            self.prune_images()
+        elif choice == 17:
+            self.container_stats()
+        elif choice == 18:
+            self.autoscale_weather_workers()
         elif choice == 20:
             return False
         elif choice == 99 or choice == 0:
@@ -65,12 +87,12 @@ class DockerMenu(AbstractMenu):
 
     def list_containers(self, is_all=True, status=None):
         """
-        List Docker containers.
+        List Docker containers from the live container cache.
         :param is_all: bool indicating whether to list all containers or only running ones
         :param status: list of DockerContainerStatus to filter by
         :return: list of container IDs
         """
-        container_list = self.docker_controller.list_containers(is_all=is_all, status=status)
+        container_list = self.docker_controller.container_cache.list_containers(is_all=is_all, status=status)
         for (index, container) in enumerate(container_list):
             print(container_to_string(container, index))
 
@@ -293,3 +315,169 @@ class DockerMenu(AbstractMenu):
             print("Weather data pipeline executed successfully.")
         except Exception as e:
             print(f"Failed to run weather data pipeline: {e}")
+
+    def watch_containers(self):
+        """
+        Show a live view of the containers, refreshed in place whenever a container changes state.
+        :return: None
+        """
+        container_cache = self.docker_controller.container_cache
+        version = None
+        try:
+            while True:
+                new_version = container_cache.wait_for_change(version, timeout=1)
+                if new_version == version:
+                    continue
+                version = new_version
+                # clear the screen and move the cursor to the top so the view refreshes in place
+                print("\033[H\033[J", end="")
+                print(f"=== Containers (updated {time.strftime('%H:%M:%S')}) ===")
+                container_list = container_cache.list_containers(is_all=True)
+                if not container_list:
+                    print("No containers found.")
+                for (index, container) in enumerate(container_list):
+                    print(container_to_string(container, index))
+                print("Press Ctrl+C to return to the menu.")
+        except KeyboardInterrupt:
+            print()
+
+    def analyse_image_layers(self):
+        """
+        Show how much of each Docker image's size is unique to it and how much is shared with other images.
+        :return: None
+        """
+        try:
+            analysis = self.docker_controller.analyse_images()
+        except Exception as e:
+            print(f"Failed to analyse Docker images: {e}")
+            return
+        if not analysis.images:
+            print("No Docker images found.")
+            return
+        print("Docker Image Layers:")
+        images = sorted(analysis.images.values(), key=lambda image: analysis.unique_bytes(image.id), reverse=True)
+        for (index, image) in enumerate(images):
+            tags = ', '.join(image.tags) if image.tags else "<none>:<none>"
+            print(f"{index + 1}. ID: {image.id[7:19]} - Tags: {tags} - Layers: {len(image.layers)} - "
+                  f"Size: {bytes_to_string(image.size)} - Unique: {bytes_to_string(analysis.unique_bytes(image.id))} - "
+                  f"Shared: {bytes_to_string(analysis.shared_bytes(image.id))}"
+                  f"{'' if image.is_used else ' (unused)'}")
+        shared_layers = [chain_id for chain_id, image_ids in analysis.layer_index.items() if len(image_ids) > 1]
+        print(f"{len(analysis.layer_index)} layers in total, {len(shared_layers)} shared between images "
+              f"({bytes_to_string(sum(analysis.layer_sizes[chain_id] for chain_id in shared_layers))}).")
+
+    def prune_images(self):
+        """
+        Remove dangling or unused Docker images, largest reclaimable space first.
+        :return: None
+        """
+        prune_options = list_ordered_list(['dangling', 'unused'], "Images to prune:")
+        prune_option = get_user_input("Select the images to prune", default_value=prune_options[0],
+                                      available_options=prune_options)
+        if not prune_option:
+            return
+        try:
+            analysis = self.docker_controller.analyse_images()
+        except Exception as e:
+            print(f"Failed to analyse Docker images: {e}")
+            return
+        candidates = analysis.prune_candidates(include_unused=prune_option == 'unused')
+        if not candidates:
+            print(f"No {prune_option} Docker images found.")
+            return
+        print(f"{prune_option.capitalize()} Docker images, largest reclaimable space first:")
+        for (index, image) in enumerate(candidates):
+            tags = ', '.join(image.tags) if image.tags else "<none>:<none>"
+            print(f"{index + 1}. ID: {image.id[7:19]} - Tags: {tags} - "
+                  f"Reclaimable: {bytes_to_string(analysis.unique_bytes(image.id))}")
+        image_ids = [image.id for image in candidates]
+        print(f"Removing all of them would free {bytes_to_string(analysis.reclaimable_bytes(image_ids))}.")
+
+        dry_run_options = ['yes', 'no']
+        dry_run = get_user_input("Dry run only", default_value=dry_run_options[0], available_options=dry_run_options)
+        if not dry_run:
+            return
+        try:
+            for (image_id, error) in self.docker_controller.prune_images(candidates, dry_run=dry_run == 'yes'):
+                if error:
+                    print(f"Failed to remove Docker image '{image_id}': {error}")
+                elif dry_run == 'yes':
+                    print(f"Dry run: Docker image '{image_id}' would be removed.")
+                else:
+                    print(f"Docker image '{image_id}' removed successfully.")
+        except Exception as e:
+            print(f"Failed to prune Docker images: {e}")
+
+    def container_stats(self, max_rows=30):
+        """
+        Show a top-like view of the resource usage of the running containers, refreshed every second, and optionally
+        export the stats history to CSV afterwards.
+        :param max_rows: int maximum number of containers to display
+        :return: None
+        """
+        try:
+            stats_sampler = self.docker_controller.create_stats_sampler()
+        except Exception as e:
+            print(f"Failed to start sampling container stats: {e}")
+            return
+        container_cache = self.docker_controller.container_cache
+        try:
+            while True:
+                stats_sampler.sync(container_cache.list_containers(is_all=False))
+                rows = stats_sampler.top()
+                # clear the screen and move the cursor to the top so the view refreshes in place
+                print("\033[H\033[J", end="")
+                print(f"=== Container Stats (updated {time.strftime('%H:%M:%S')}) ===")
+                print(f"{'CONTAINER':<12} {'NAME':<24} {'CPU %':>7} {'MEM USAGE':>10} {'MEM %':>7} {'NET RX/s':>10} "
+                      f"{'NET TX/s':>10} {'BLOCK R/s':>10} {'BLOCK W/s':>10}")
+                for (container_stats, metrics) in rows[:max_rows]:
+                    print(f"{container_stats.id[:12]:<12} {container_stats.name[:24]:<24} "
+                          f"{metrics['cpu_percent']:>7.2f} {bytes_to_string(metrics['memory_bytes']):>10} "
+                          f"{metrics['memory_percent']:>7.2f} {bytes_to_string(metrics['net_rx_rate']):>10} "
+                          f"{bytes_to_string(metrics['net_tx_rate']):>10} "
+                          f"{bytes_to_string(metrics['block_read_rate']):>10} "
+                          f"{bytes_to_string(metrics['block_write_rate']):>10}")
+                if len(rows) > max_rows:
+                    print(f"... and {len(rows) - max_rows} more containers")
+                if not rows:
+                    print("No running containers.")
+                print("Press Ctrl+C to stop.")
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print()
+        finally:
+            stats_sampler.stop()
+
+        csv_path = get_user_input("Enter a CSV file path to export the stats history to",
+                                  default_value='container_stats.csv')
+        if not csv_path:
+            return
+        try:
+            rows_written = stats_sampler.export_csv(csv_path)
+            print(f"Exported {rows_written} samples to '{csv_path}'.")
+        except Exception as e:
+            print(f"Failed to export container stats: {e}")
+
+    def autoscale_weather_workers(self):
+        """
+        Start or stop weather worker containers depending on the weather jobs queue, until interrupted.
+        The weather pipeline must already be running.
+        :return: None
+        """
+        redis_host = get_user_input("Enter the weather pipeline's Redis host", default_value='localhost')
+        if not redis_host:
+            return
+        min_replicas = get_user_input("Enter the minimum number of workers", InputType.INT, default_value=1)
+        if not min_replicas:
+            return
+        max_replicas = get_user_input("Enter the maximum number of workers", InputType.INT, default_value=5)
+        if not max_replicas:
+            return
+        try:
+            import redis
+            redis_client = redis.Redis(host=redis_host, port=6379, db=0)
+            redis_client.ping()
+            policy = ScalingPolicy(min_replicas=min_replicas, max_replicas=max_replicas)
+            WorkerAutoscaler(self.docker_controller, redis_client, policy).run()
+        except Exception as e:
+            print(f"Failed to autoscale weather workers: {e}")
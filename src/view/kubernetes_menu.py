@@ -0,0 +1,132 @@
+import time
+
+from src.controller.kubernetes_controller import KubernetesController
+from src.utils.list_utils import deployment_to_string, pod_to_string
+from src.utils.user_input_handler import get_user_input, InputType
+from src.view.abstract_menu import AbstractMenu
+
+
+class KubernetesMenu(AbstractMenu):
+    def __init__(self):
+        kubernetes_menu_options = \
+            {1: "List Pods",
+             2: "List Deployments",
+             3: "Scale Deployment",
+             4: "Get Pod Logs",
+             5: "Watch Pods",
+             20: "Main Menu",
+             99: "Exit"}
+        super().__init__("Kubernetes Menu", kubernetes_menu_options)
+        self.kubernetes_controller = KubernetesController()
+
+    def display_options(self):
+        if not self.kubernetes_controller.is_ready():
+            print("Connecting to Kubernetes in the background...")
+        super().display_options()
+
+    def execute_choice(self, choice):
+        if choice == 1:
+            self.list_pods()
+        elif choice == 2:
+            self.list_deployments()
+        elif choice == 3:
+            self.scale_deployment()
+        elif choice == 4:
+            self.get_pod_logs()
+        elif choice == 5:
+            self.watch_pods()
+        elif choice == 20:
+            # keep watching the cluster so the caches are current when the menu is opened again
+            return False
+        elif choice == 99 or choice == 0:
+            self.exit_application()
+        else:
+            self.handle_invalid_choice()
+        return True
+
+    def list_pods(self):
+        """
+        List Kubernetes pods from the local cache.
+        :return: list of pod keys ("namespace/name")
+        """
+        pods = self.kubernetes_controller.list_pods()
+        if not pods:
+            print("No pods found.")
+        for (index, pod) in enumerate(pods):
+            print(pod_to_string(pod, index))
+        return [f"{pod.metadata.namespace}/{pod.metadata.name}" for pod in pods]
+
+    def list_deployments(self):
+        """
+        List Kubernetes deployments from the local cache.
+        :return: list of deployment keys ("namespace/name")
+        """
+        deployments = self.kubernetes_controller.list_deployments()
+        if not deployments:
+            print("No deployments found.")
+        for (index, deployment) in enumerate(deployments):
+            print(deployment_to_string(deployment, index))
+        return [f"{deployment.metadata.namespace}/{deployment.metadata.name}" for deployment in deployments]
+
+    def scale_deployment(self):
+        """
+        Scale a Kubernetes deployment.
+        :return: None
+        """
+        deployments = self.list_deployments()
+        if not deployments:
+            return
+        deployment_key = get_user_input("Enter the deployment to scale", available_options=deployments)
+        if not deployment_key:
+            return
+        deployment = self.kubernetes_controller.get_deployment(deployment_key)
+        current_replicas = deployment.spec.replicas if deployment else ''
+        replicas = get_user_input("Enter the number of replicas", InputType.INT, default_value=current_replicas)
+        # 0 replicas is valid, so only a bool False means the operation was cancelled
+        if replicas is False:
+            return
+        if replicas < 0:
+            print("The number of replicas cannot be negative.")
+            return
+        try:
+            self.kubernetes_controller.scale_deployment(deployment_key, replicas)
+            print(f"Deployment '{deployment_key}' scaled to {replicas} replicas.")
+        except Exception as e:
+            print(f"Failed to scale deployment: {e}")
+
+    def get_pod_logs(self):
+        """
+        Print the logs of a Kubernetes pod.
+        :return: None
+        """
+        pods = self.list_pods()
+        if not pods:
+            return
+        pod_key = get_user_input("Enter the pod to get logs from", available_options=pods)
+        if not pod_key:
+            return
+        try:
+            print(self.kubernetes_controller.get_pod_logs(pod_key))
+        except Exception as e:
+            print(f"Failed to get pod logs: {e}")
+
+    def watch_pods(self):
+        """
+        Show a live view of the pods, refreshed in place whenever a pod changes.
+        :return: None
+        """
+        pod_informer = self.kubernetes_controller.pod_informer
+        version = None
+        try:
+            while True:
+                new_version = pod_informer.wait_for_change(version, timeout=1)
+                if new_version == version:
+                    continue
+                version = new_version
+                # clear the screen and move the cursor to the top so the view refreshes in place
+                print("\033[H\033[J", end="")
+                print(f"=== Pods (updated {time.strftime('%H:%M:%S')}) ===")
+                self.list_pods()
+                print("Press Ctrl+C to return to the menu.")
+        except KeyboardInterrupt:
+            print()
@@ -1,14 +1,26 @@
+from src.utils import startup_timer
 from src.view.abstract_menu import AbstractMenu
 
 
 def open_docker_menu():
+    startup_timer.mark("open: Docker Menu")
     from src.view.docker_menu import DockerMenu
     docker_menu = DockerMenu()
     docker_menu.run()
 
 
+# created on first use and kept, so its cluster caches stay current instead of being listed and watched again every
+# time the menu is opened
+kubernetes_menu = None
+
+
 def open_kubernetes_menu():
-    raise NotImplementedError("Kubernetes management menu is not yet implemented.")
+    global kubernetes_menu
+    startup_timer.mark("open: Kubernetes Menu")
+    if kubernetes_menu is None:
+        from src.view.kubernetes_menu import KubernetesMenu
+        kubernetes_menu = KubernetesMenu()
+    kubernetes_menu.run()
 
 
 class MainMenu(AbstractMenu):
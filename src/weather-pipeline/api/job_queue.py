@@ -0,0 +1,117 @@
+import json
+import uuid
+
+WEATHER_JOBS_LIST = "weather_jobs"
+WEATHER_JOBS_STREAM = "weather_jobs_stream"
+WEATHER_WORKERS_GROUP = "weather_workers"
+
+
+class ListJobQueue:
+    """
+    Job queue on a plain Redis list: jobs are pushed with LPUSH and popped by the worker with BRPOP.
+    """
+    type = "list"
+    key = WEATHER_JOBS_LIST
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+
+    def enqueue(self, job):
+        """
+        Add a job to the queue.
+        :param job: dict job
+        :return: str ID of the job
+        """
+        return self.enqueue_many([job])[0]
+
+    def enqueue_many(self, jobs):
+        """
+        Add several jobs to the queue with a single multi-value LPUSH.
+        Lists have no entry IDs, so each job is given a random ID which is stored in the job itself.
+        :param jobs: list of dict jobs
+        :return: list of str IDs of the jobs, in the same order
+        """
+        job_ids = [str(uuid.uuid4()) for _ in jobs]
+        self.redis_client.lpush(self.key, *[json.dumps({"id": job_id, **job}) for job_id, job in zip(job_ids, jobs)])
+        return job_ids
+
+    def get_lag(self):
+        """
+        Get how far behind the workers are.
+        :return: dict with the number of queued jobs
+        """
+        return {"transport": self.type, "queued": self.redis_client.llen(self.key)}
+
+
+class StreamJobQueue:
+    """
+    Job queue on a Redis stream read by a consumer group: jobs are added with XADD (trimming old entries) and read by
+    the workers with XREADGROUP, which only acknowledge them with XACK once they're saved.
+    """
+    type = "stream"
+    key = WEATHER_JOBS_STREAM
+
+    def __init__(self, redis_client, max_length=100000):
+        """
+        :param redis_client: redis.Redis to use
+        :param max_length: int approximate number of entries kept in the stream; older entries are trimmed, so it must
+        be well above the number of jobs waiting to be processed
+        :return: None
+        """
+        self.redis_client = redis_client
+        self.max_length = max_length
+
+    def enqueue(self, job):
+        """
+        Add a job to the stream.
+        :param job: dict job
+        :return: str stream entry ID of the job
+        """
+        return self.enqueue_many([job])[0]
+
+    def enqueue_many(self, jobs):
+        """
+        Add several jobs to the stream, pipelining the XADDs into a single round trip.
+        :param jobs: list of dict jobs
+        :return: list of str stream entry IDs of the jobs, in the same order
+        """
+        pipeline = self.redis_client.pipeline(transaction=False)
+        for job in jobs:
+            pipeline.xadd(self.key, {"job": json.dumps(job)}, maxlen=self.max_length, approximate=True)
+        return [job_id.decode() for job_id in pipeline.execute()]
+
+    def get_lag(self):
+        """
+        Get how far behind the consumer group and each of its consumers are.
+        :return: dict with the jobs not yet delivered to any worker ("lag"), the jobs delivered but not yet
+        acknowledged ("pending"), and the pending jobs and idle time of each consumer
+        """
+        if not self.redis_client.exists(self.key):
+            return {"transport": self.type, "lag": 0, "pending": 0, "consumers": []}
+        group = next((group for group in self.redis_client.xinfo_groups(self.key)
+                      if group["name"].decode() == WEATHER_WORKERS_GROUP), None)
+        if group is None:
+            # no worker has created the group yet, so nothing has been read
+            return {"transport": self.type, "lag": self.redis_client.xlen(self.key), "pending": 0, "consumers": []}
+        consumers = self.redis_client.xinfo_consumers(self.key, WEATHER_WORKERS_GROUP)
+        return {
+            "transport": self.type,
+            "lag": group.get("lag"),
+            "pending": group["pending"],
+            "consumers": [{"name": consumer["name"].decode(), "pending": consumer["pending"],
+                           "idle_ms": consumer["idle"]} for consumer in consumers],
+        }
+
+
+def create_job_queue(redis_client, transport):
+    """
+    Create the job queue for the configured transport.
+    :param redis_client: redis.Redis to use
+    :param transport: str "list" or "stream"
+    :return: ListJobQueue or StreamJobQueue
+    """
+    if transport == "list":
+        return ListJobQueue(redis_client)
+    if transport == "stream":
+        return StreamJobQueue(redis_client)
+    raise ValueError(f"Unknown job transport '{transport}'. Expected 'list' or 'stream'.")
@@ -1,11 +1,18 @@
 import json
 import os
+import re
 
 import psycopg2
+import psycopg2.pool
 import redis
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
+from job_queue import WEATHER_WORKERS_GROUP, create_job_queue
+from rate_limiter import AdmissionController, QUEUE_FULL, RATE_LIMITED
+from weather_export import EXPORT_MEDIA_TYPES, WeatherExport, WeatherExportResponse
+
 app = FastAPI()
 
 app.add_middleware(
@@ -14,6 +21,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "Server-Timing", "Content-Disposition"],
 )
 
 redis_client = redis.Redis(host=os.getenv("REDIS_HOST"), port=6379, db=0)
@@ -25,13 +33,112 @@ db_conn = psycopg2.connect(
     dbname=os.getenv("DB_NAME")
 )
 
+# exports hold a server-side cursor (and so a transaction) open while streaming, so each gets its own connection
+export_pool = psycopg2.pool.ThreadedConnectionPool(
+    1,
+    int(os.getenv("MAX_CONCURRENT_EXPORTS", "4")),
+    host=os.getenv("DB_HOST"),
+    user=os.getenv("DB_USER"),
+    password=os.getenv("DB_PASS"),
+    dbname=os.getenv("DB_NAME")
+)
+
+# "list" (LPUSH/BRPOP) or "stream" (Redis Streams consumer group), must match the worker's
+job_queue = create_job_queue(redis_client, os.getenv("JOB_TRANSPORT", "list"))
+
+admission_controller = AdmissionController(
+    redis_client,
+    job_queue.key,
+    capacity=int(os.getenv("RATE_LIMIT_CAPACITY", "10")),
+    refill_per_second=float(os.getenv("RATE_LIMIT_REFILL_PER_SECOND", "1")),
+    max_queue_depth=int(os.getenv("MAX_QUEUE_DEPTH", "1000")),
+    queue_type=job_queue.type,
+    consumer_group=WEATHER_WORKERS_GROUP,
+)
+
+
+def admit(request: Request, response: Response, cost: int = 1):
+    # reject the request if the client is over its rate limit or the queue has no room for its jobs
+    status, retry_after, latency_ms = admission_controller.check(request.client.host, cost)
+    if status == RATE_LIMITED:
+        raise HTTPException(status_code=429, detail="Too many requests.",
+                            headers={"Retry-After": str(retry_after)})
+    if status == QUEUE_FULL:
+        raise HTTPException(status_code=503, detail="The weather queue is full. Try again later.",
+                            headers={"Retry-After": str(retry_after)})
+    # lets clients (and the browser's dev tools) see how long the admission check took
+    response.headers["Server-Timing"] = f"admission;dur={latency_ms:.2f}"
+
+
+CITY_PATTERN = re.compile(r"^[^\W\d_]+(?:[ '.-]+[^\W\d_]+)*\.?$")
+
+
+def parse_cities(body: bytes, content_type: str):
+    # accepts a JSON list of cities, {"cities": [...]}, or NDJSON with a city (or {"city": ...}) per line
+    if "ndjson" in content_type:
+        entries = [json.loads(line) for line in body.decode().splitlines() if line.strip()]
+    else:
+        entries = json.loads(body)
+        if isinstance(entries, dict):
+            entries = entries.get("cities")
+    if not isinstance(entries, list):
+        raise ValueError("Expected a list of cities.")
+    return [entry.get("city") if isinstance(entry, dict) else entry for entry in entries]
+
+
+def normalize_city(city):
+    # collapse whitespace and capitalise each word, so "  new   york" becomes "New York"
+    if not isinstance(city, str):
+        return None
+    city = " ".join(city.split())
+    if not city or len(city) > 100 or not CITY_PATTERN.match(city):
+        return None
+    return " ".join(word[:1].upper() + word[1:] for word in city.split(" "))
+
+
+# declared before /weather/{city} so "batch" isn't taken as a city
+@app.post("/weather/batch")
+async def request_weather_batch(request: Request, response: Response):
+    try:
+        cities = parse_cities(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        # json.JSONDecodeError is a ValueError too
+        raise HTTPException(status_code=400, detail=f"Invalid body: {e}")
+    # every city takes a token from the client's bucket, so more cities than it holds could never be admitted
+    if len(cities) > admission_controller.capacity:
+        raise HTTPException(status_code=413, detail=f"At most {admission_controller.capacity} cities can be requested "
+                                                    f"at once.")
+
+    jobs = []
+    rejected = []
+    seen = set()
+    for city in cities:
+        normalized = normalize_city(city)
+        if normalized is None:
+            rejected.append({"city": city, "reason": "invalid city name"})
+        elif normalized.casefold() not in seen:
+            # the same city requested twice (in any case) is only queued once
+            seen.add(normalized.casefold())
+            jobs.append({"city": normalized})
+    if not jobs:
+        raise HTTPException(status_code=422, detail={"message": "No valid cities.", "rejected": rejected})
+
+    await run_in_threadpool(admit, request, response, len(jobs))
+    # send all the jobs to Redis in a single round trip
+    job_ids = await run_in_threadpool(job_queue.enqueue_many, jobs)
+    return {
+        "status": "queued",
+        "jobs": [{"city": job["city"], "job_id": job_id} for job, job_id in zip(jobs, job_ids)],
+        "rejected": rejected,
+    }
+
 
 @app.post("/weather/{city}")
-def request_weather(city: str):
+def request_weather(city: str, request: Request, response: Response):
+    admit(request, response)
     # send job to Redis
-    job = json.dumps({"city": city})
-    redis_client.lpush("weather_jobs", job)
-    return {"status": "queued", "city": city}
+    job_id = job_queue.enqueue({"city": city})
+    return {"status": "queued", "city": city, "job_id": job_id}
 
 
 @app.get("/weather")
@@ -42,7 +149,30 @@ def get_weather_entries():
     return [{"city": r[0], "temperature": r[1]} for r in rows]
 
 
+@app.get("/weather/export")
+def export_weather_entries(export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+                           compress: bool = Query(False, alias="gzip")):
+    # streams the whole table without loading it into memory, unlike GET /weather
+    file_name = f"weather_data.{export_format}" + (".gz" if compress else "")
+    # take the connection before the response starts, once the 200 is sent an error can't be reported anymore
+    try:
+        connection = export_pool.getconn()
+    except psycopg2.pool.PoolError:
+        raise HTTPException(status_code=503, detail="Too many exports are running. Try again later.",
+                            headers={"Retry-After": "5"})
+    return WeatherExportResponse(
+        WeatherExport(export_pool, connection, export_format, compress),
+        media_type="application/gzip" if compress else EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{file_name}"'},
+    )
+
+
 @app.get("/queue")
 def get_queue():
     queue = redis_client.lrange("weather_queue", 0, -1)
     return queue
+
+
+@app.get("/queue/lag")
+def get_queue_lag():
+    return job_queue.get_lag()
@@ -0,0 +1,108 @@
+import math
+import time
+
+# Checks the queue has room for the jobs, then takes a token per job from the client's bucket, in a single atomic
+# round trip to Redis.
+# The bucket is refilled from the time elapsed since it was last used, using Redis' clock so every API replica agrees.
+# Returns {status, retry_after}: status 0 = allowed, 1 = rate limited, 2 = queue full.
+# Numbers are returned as strings because Redis truncates Lua numbers to integers.
+ADMISSION_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill_per_second = tonumber(ARGV[2])
+local max_queue_depth = tonumber(ARGV[3])
+local cost = tonumber(ARGV[6])
+
+if max_queue_depth > 0 then
+    local queue_depth = 0
+    if ARGV[4] == 'stream' then
+        -- jobs not yet delivered to a worker plus jobs delivered but not yet acknowledged, or the length of the
+        -- stream if there is no group yet or Redis can't tell its lag (the autoscaler does the same)
+        local groups = redis.pcall('XINFO', 'GROUPS', KEYS[2])
+        if groups['err'] == nil then
+            queue_depth = redis.call('XLEN', KEYS[2])
+            for _, group in ipairs(groups) do
+                local fields = {}
+                for i = 1, #group, 2 do
+                    fields[group[i]] = group[i + 1]
+                end
+                if fields['name'] == ARGV[5] and fields['lag'] then
+                    queue_depth = tonumber(fields['lag']) + tonumber(fields['pending'])
+                end
+            end
+        end
+    else
+        queue_depth = redis.call('LLEN', KEYS[2])
+    end
+    if queue_depth + cost > max_queue_depth then
+        return {2, '0'}
+    end
+end
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * refill_per_second)
+
+local status = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    status = 1
+    retry_after = (cost - tokens) / refill_per_second
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / refill_per_second) + 1)
+return {status, tostring(retry_after)}
+"""
+
+ALLOWED = 0
+RATE_LIMITED = 1
+QUEUE_FULL = 2
+
+
+class AdmissionController:
+    def __init__(self, redis_client, queue_key, capacity=10, refill_per_second=1.0, max_queue_depth=1000,
+                 queue_full_retry_after=5, key_prefix="rate_limit:", queue_type="list", consumer_group=""):
+        """
+        Per-client token bucket rate limiter with a global check on the queue depth, backed by Redis.
+        :param redis_client: redis.Redis to keep the buckets in
+        :param queue_key: str Redis key of the job queue
+        :param capacity: int maximum number of jobs a client can burst
+        :param refill_per_second: float jobs per second a client can sustain
+        :param max_queue_depth: int queue length at which new jobs are rejected, or 0 for no limit
+        :param queue_full_retry_after: int seconds clients are told to wait when the queue is full
+        :param key_prefix: str prefix of the Redis keys of the buckets
+        :param queue_type: str "list" or "stream", the type of the job queue
+        :param consumer_group: str consumer group reading the queue, if it is a stream
+        :return: None
+        """
+        self.queue_key = queue_key
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_queue_depth = max_queue_depth
+        self.queue_full_retry_after = queue_full_retry_after
+        self.key_prefix = key_prefix
+        self.queue_type = queue_type
+        self.consumer_group = consumer_group
+        self._script = redis_client.register_script(ADMISSION_SCRIPT)
+
+    def check(self, client_id, cost=1):
+        """
+        Check whether a client can enqueue jobs, taking a token per job from its bucket if so.
+        :param client_id: str identifier of the client (e.g. its IP address)
+        :param cost: int number of jobs the client wants to enqueue, at most capacity
+        :return: (int status - ALLOWED, RATE_LIMITED or QUEUE_FULL, int seconds to wait before retrying,
+        float milliseconds the check took)
+        """
+        start = time.perf_counter()
+        status, retry_after = self._script(keys=[self.key_prefix + client_id, self.queue_key],
+                                           args=[self.capacity, self.refill_per_second, self.max_queue_depth,
+                                                 self.queue_type, self.consumer_group, cost])
+        latency_ms = (time.perf_counter() - start) * 1000
+        if status == QUEUE_FULL:
+            return QUEUE_FULL, self.queue_full_retry_after, latency_ms
+        return status, math.ceil(float(retry_after)), latency_ms
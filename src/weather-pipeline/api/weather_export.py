@@ -0,0 +1,162 @@
+import csv
+import io
+import json
+import threading
+import uuid
+import zlib
+
+import psycopg2
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+try:
+    # much faster than json for serializing many small rows, but optional
+    import orjson
+except ImportError:
+    orjson = None
+
+EXPORT_COLUMNS = ["city", "temperature"]
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def rows_to_ndjson(rows):
+    """
+    Serialize rows as NDJSON.
+    :param rows: list of (city, temperature) tuples
+    :return: bytes one JSON object per line
+    """
+    if orjson is not None:
+        return b"".join(orjson.dumps({"city": city, "temperature": temperature}) + b"\n"
+                        for city, temperature in rows)
+    return "".join(json.dumps({"city": city, "temperature": temperature}) + "\n"
+                   for city, temperature in rows).encode()
+
+
+def rows_to_csv(rows):
+    """
+    Serialize rows as CSV, without the header.
+    :param rows: list of (city, temperature) tuples
+    :return: bytes CSV lines
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+
+class WeatherExport:
+    def __init__(self, connection_pool, connection, export_format="ndjson", compress=False, chunk_size=5000):
+        """
+        Stream the weather_data table in fixed-size chunks from a server-side cursor, so only one chunk is in memory at
+        a time however big the table is.
+        The connection is taken from the pool by the caller before the response starts, so running out of connections
+        can still be reported with an error status. It is given back to the pool as soon as the export ends or fails,
+        or when close() is called, even if the export never started (e.g. the client went away before the first chunk).
+        :param connection_pool: psycopg2 connection pool the connection was taken from
+        :param connection: psycopg2 connection to run the export on
+        :param export_format: str "ndjson" or "csv"
+        :param compress: bool indicating whether to gzip the output
+        :param chunk_size: int number of rows fetched and serialized at a time
+        :return: None
+        """
+        self.connection_pool = connection_pool
+        self.connection = connection
+        self.export_format = export_format
+        self.chunk_size = chunk_size
+        self._serialize = rows_to_ndjson if export_format == "ndjson" else rows_to_csv
+        self._compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31 writes a gzip header
+        self._cursor = None
+        self._is_header_sent = export_format != "csv"
+        self._is_closed = False
+        # the chunks are read in a worker thread while close() can be called from another one
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        with self._lock:
+            if self._is_closed:
+                raise StopIteration
+            try:
+                data = self._next_chunk()
+            except Exception:
+                self._release()
+                raise
+            if data is None:
+                self._release()
+                raise StopIteration
+            return data
+
+    def _output(self, data):
+        return self._compressor.compress(data) if self._compressor else data
+
+    def _next_chunk(self):
+        """
+        Read and serialize the next chunk of the export. Must be called holding the lock.
+        :return: bytes chunk, or None once the export is complete
+        """
+        if not self._is_header_sent:
+            self._is_header_sent = True
+            return self._output(",".join(EXPORT_COLUMNS).encode() + b"\r\n")
+        if self._cursor is None:
+            # a named cursor is a server-side cursor: Postgres keeps the result and sends it chunk_size rows at a time
+            self._cursor = self.connection.cursor(name=f"weather_export_{uuid.uuid4().hex}")
+            self._cursor.itersize = self.chunk_size
+            self._cursor.execute("SELECT city, temperature FROM weather_data ORDER BY id")
+        while True:
+            rows = self._cursor.fetchmany(self.chunk_size)
+            if not rows:
+                break
+            data = self._output(self._serialize(rows))
+            if data:
+                return data
+        if self._compressor:
+            data, self._compressor = self._compressor.flush(), None
+            return data
+        return None
+
+    def _release(self):
+        """
+        Give the connection back to the pool, once. Must be called holding the lock.
+        :return: None
+        """
+        if self._is_closed:
+            return
+        self._is_closed = True
+        # end the read-only transaction the cursor ran in before giving the connection back, or throw the connection
+        # away if it's broken so the pool doesn't lose a slot
+        try:
+            if self._cursor is not None:
+                self._cursor.close()
+            self.connection.rollback()
+        except psycopg2.Error:
+            self.connection_pool.putconn(self.connection, close=True)
+        else:
+            self.connection_pool.putconn(self.connection)
+
+    def close(self):
+        """
+        Stop the export and give its connection back to the pool, if that hasn't happened yet.
+        :return: None
+        """
+        with self._lock:
+            self._release()
+
+
+class WeatherExportResponse(StreamingResponse):
+    def __init__(self, export, **kwargs):
+        """
+        Streaming response that always closes its export once the response is over, however it ended. Starlette doesn't
+        close the iterator of an aborted response, so the export's connection would otherwise never go back to the pool.
+        :param export: WeatherExport to stream
+        :return: None
+        """
+        super().__init__(export, **kwargs)
+        self.export = export
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # may wait for a chunk being read in a worker thread, so it can't run on the event loop
+            await run_in_threadpool(self.export.close)
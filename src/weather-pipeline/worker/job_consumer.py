@@ -0,0 +1,119 @@
+import socket
+import time
+
+import redis
+
+WEATHER_JOBS_LIST = "weather_jobs"
+WEATHER_JOBS_STREAM = "weather_jobs_stream"
+WEATHER_WORKERS_GROUP = "weather_workers"
+
+
+class ListJobConsumer:
+    """
+    Reads jobs from a plain Redis list with BRPOP. A job is removed from the list as soon as it's read, so there is
+    nothing to acknowledge.
+    """
+
+    def __init__(self, redis_client, block_seconds=5):
+        self.redis_client = redis_client
+        self.block_seconds = block_seconds
+
+    def read(self):
+        """
+        Wait for the next job.
+        :return: list of (job ID, str JSON encoded job) tuples, empty if no job arrived in time
+        """
+        job = self.redis_client.brpop(WEATHER_JOBS_LIST, timeout=self.block_seconds)
+        return [(None, job[1])] if job else []
+
+    def ack(self, job_ids):
+        pass
+
+
+class StreamJobConsumer:
+    """
+    Reads jobs from a Redis stream as a member of the weather workers consumer group. Jobs stay pending until they are
+    acknowledged with XACK, so a job read by a worker that dies before saving it is claimed by another worker with
+    XAUTOCLAIM once it has been idle for claim_idle_ms.
+    """
+
+    def __init__(self, redis_client, consumer_name=None, batch_size=10, block_ms=5000, claim_idle_ms=60000):
+        """
+        :param redis_client: redis.Redis to use
+        :param consumer_name: str name of this worker in the group, defaults to the host name (the container ID)
+        :param batch_size: int maximum number of jobs read at once
+        :param block_ms: int milliseconds to wait for new jobs
+        :param claim_idle_ms: int milliseconds a job must have been pending before another worker claims it
+        :return: None
+        """
+        self.redis_client = redis_client
+        self.consumer_name = consumer_name or socket.gethostname()
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self._last_claim_time = 0.0
+        # start with the jobs this consumer read but didn't acknowledge before restarting
+        self._read_id = "0"
+        try:
+            self.redis_client.xgroup_create(WEATHER_JOBS_STREAM, WEATHER_WORKERS_GROUP, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def _claim_stuck_jobs(self):
+        """
+        Claim the jobs other workers have left pending for too long.
+        :return: list of (job ID, str JSON encoded job) tuples
+        """
+        _, messages, *_ = self.redis_client.xautoclaim(WEATHER_JOBS_STREAM, WEATHER_WORKERS_GROUP,
+                                                       self.consumer_name, min_idle_time=self.claim_idle_ms,
+                                                       count=self.batch_size)
+        # entries trimmed from the stream while pending come back without fields
+        return [(job_id, fields[b"job"]) for job_id, fields in messages if fields]
+
+    def read(self):
+        """
+        Read the next batch of jobs, claiming stuck jobs from other workers from time to time.
+        :return: list of (job ID, str JSON encoded job) tuples, empty if no job arrived in time
+        """
+        if time.monotonic() - self._last_claim_time > self.claim_idle_ms / 1000:
+            self._last_claim_time = time.monotonic()
+            claimed = self._claim_stuck_jobs()
+            if claimed:
+                print(f"Claimed {len(claimed)} stuck jobs")
+                return claimed
+
+        response = self.redis_client.xreadgroup(WEATHER_WORKERS_GROUP, self.consumer_name,
+                                                {WEATHER_JOBS_STREAM: self._read_id}, count=self.batch_size,
+                                                block=None if self._read_id == "0" else self.block_ms)
+        messages = response[0][1] if response else []
+        if self._read_id == "0":
+            # entries trimmed from the stream while pending come back without fields and can't be processed
+            self.ack([job_id for job_id, fields in messages if not fields])
+            if len(messages) < self.batch_size:
+                # no more pending jobs of our own, read new ones from now on
+                self._read_id = ">"
+        return [(job_id, fields[b"job"]) for job_id, fields in messages if fields]
+
+    def ack(self, job_ids):
+        """
+        Acknowledge jobs once they have been saved, removing them from the pending list.
+        :param job_ids: list of job IDs
+        :return: None
+        """
+        if job_ids:
+            self.redis_client.xack(WEATHER_JOBS_STREAM, WEATHER_WORKERS_GROUP, *job_ids)
+
+
+def create_job_consumer(redis_client, transport):
+    """
+    Create the job consumer for the configured transport.
+    :param redis_client: redis.Redis to use
+    :param transport: str "list" or "stream"
+    :return: ListJobConsumer or StreamJobConsumer
+    """
+    if transport == "list":
+        return ListJobConsumer(redis_client)
+    if transport == "stream":
+        return StreamJobConsumer(redis_client)
+    raise ValueError(f"Unknown job transport '{transport}'. Expected 'list' or 'stream'.")
@@ -1,11 +1,14 @@
 import json
 import os
 import random
+import signal
 import time
 
 import psycopg2
 import redis
 
+from job_consumer import create_job_consumer
+
 redis_client = redis.Redis(host=os.getenv("REDIS_HOST"), port=6379, db=0)
 
 db_conn = psycopg2.connect(
@@ -32,23 +35,44 @@ cursor.execute("""
                """)
 db_conn.commit()
 
+# "list" (BRPOP) or "stream" (Redis Streams consumer group), must match the API's
+job_consumer = create_job_consumer(redis_client, os.getenv("JOB_TRANSPORT", "list"))
+
+is_stopping = False
+
+
+def stop(signum, frame):
+    # docker stop sends SIGTERM: finish the jobs being processed and exit instead of being killed 10 seconds later
+    global is_stopping
+    is_stopping = True
+
+
+signal.signal(signal.SIGTERM, stop)
+
 print("Worker started – waiting for jobs...")
 
-while True:
-    job = redis_client.brpop("weather_jobs", timeout=5)
-    if job:
-        data = json.loads(job[1])
-        city = data["city"]
+while not is_stopping:
+    jobs = job_consumer.read()
+    if jobs:
+        for (_, job) in jobs:
+            data = json.loads(job)
+            city = data["city"]
 
-        # Fake weather data
-        temp = random.randint(-5, 25)
+            # Fake weather data
+            temp = random.randint(-5, 25)
 
-        print(f"Processing job: {city} → {temp}°C")
+            print(f"Processing job: {city} → {temp}°C")
 
-        cursor.execute(
-            "INSERT INTO weather_data (city, temperature) VALUES (%s, %s)",
-            (city, temp)
-        )
+            cursor.execute(
+                "INSERT INTO weather_data (city, temperature) VALUES (%s, %s)",
+                (city, temp)
+            )
         db_conn.commit()
+        # only acknowledge the jobs once they're saved, so they're processed again if the worker dies before this
+        job_consumer.ack([job_id for (job_id, _) in jobs])
+        # lets the autoscaler work out the processing rate
+        redis_client.incrby("weather_jobs_processed", len(jobs))
     else:
         time.sleep(1)
+
+print("Worker stopped.")